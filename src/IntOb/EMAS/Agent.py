@@ -1,19 +1,26 @@
 
-from random import choice, shuffle
-from operator import attrgetter
+from array import array
 from ..utils import distance, tossCoin
 
 
-class Agent(object):
+class BaseAgent(object):
+    """ Behaviour of agents, independent of where they keep their state -
+    genotype x, value val, energy, encounter_count and dist are provided
+    by subclasses.
+    """
+
+    __slots__ = ('env', 'name', 'uid')
 
     def __init__(self, x, val, energy, env):
         self.env = env
-        self.x = x
+        self.x = array('d', x)
         self.energy = energy
         self.val = val
 
         self.encounter_count = 0
         self.dist = 0
+        self.name = None
+        self.uid = None
 
     def can_travel(self):
         return self.energy >= self.env.travel_threshold
@@ -35,10 +42,13 @@ class Agent(object):
     def transfer_energy(self, other, amount):
         self.energy -= amount
         other.energy += amount
+        self.env.changed(self)
+        other.env.changed(other)
 
     def dissipate_energy(self, amount):
         self.energy -= amount
         self.env.accept_energy(amount)
+        self.env.changed(self)
 
     def attack(self, enemy):
         self.combat(enemy)
@@ -56,13 +66,14 @@ class Agent(object):
             self.env.decided_encounters += 1
         self.encounter_count += 1
         self.dist += distance(self.val, enemy.val)
+        self.env.changed(self)
 
     @property
     def spread(self):
         return self.dist / (self.encounter_count + 1)
 
     def __str__(self):
-        return '{}#{}'.format(self.name, hash(self))
+        return '{}#{}'.format(self.name or 'Agent', hash(self))
 
     # Methods determining behaviour of agent (strategy, actions)
 
@@ -80,7 +91,7 @@ class Agent(object):
             if not options[0]():
                 self.fight()
         elif len(options) == 2:
-            if tossCoin(0.3):
+            if tossCoin(0.3, self.env.rng):
                 if not self.travel():
                     if not self.reproduce():
                         self.fight()
@@ -112,40 +123,30 @@ class Agent(object):
         return True
 
     def reproduce(self):
-        mates = self.env.find_mates(self)
-        #shuffle(mates)
-        mates.sort(key=attrgetter('spread'))
-        mates.reverse()
-
-        for mate in mates:
-            if mate.reproduction_offer(self):
-                self.env.reproduce(self, mate)
-                return True
+        mate = self.env.find_mate(self)
+        if mate is not None:
+            self.env.reproduce(self, mate)
+            return True
         else:
             return False
 
     def travel(self):
-        costs = self.env.neighbour_islands()
-        islands = list(costs.keys())
-        shuffle(islands)
-
-        for island in islands:
-            cost = costs[island]
-            if self.energy >= self.env.travel_threshold + cost:
-                self.env.travel(self, island)
-                return True
+        island = self.env.random_destination(self)
+        if island is not None:
+            self.env.travel(self, island)
+            return True
         else:
             return False
 
     def fight(self):
-        enemies = self.env.find_encounters(self)
-        if enemies:
+        enemy = self.env.random_encounter(self)
+        if enemy is not None:
             max_attempts = 10
             for _ in xrange(max_attempts):
-                enemy = choice(enemies)
                 if enemy.meet_offer(self):
                     self.attack(enemy)
                     return True
+                enemy = self.env.random_encounter(self)
             else:
                 print 'Noone wants to fight ({} rejected challenges)'\
                     .format(max_attempts)
@@ -159,3 +160,66 @@ class Agent(object):
         """
         pass
 
+
+
+class Agent(BaseAgent):
+    """ Agents are created in large numbers, so they have no __dict__, and
+    keep the genotype as a compact array of doubles.
+    """
+
+    __slots__ = ('x', 'energy', 'val', 'encounter_count', 'dist')
+
+
+def column(name, convert=None):
+    """ Property reading and writing attribute name of the agent in columns
+    of its island, or in the detached state if it has none.
+    """
+    def get(self):
+        if self.columns is None:
+            return self.detached[name]
+        value = getattr(self.columns, name)[self.slot]
+        return convert(value) if convert else value
+
+    def set(self, value):
+        if self.columns is None:
+            self.detached[name] = value
+        else:
+            getattr(self.columns, name)[self.slot] = value
+
+    return property(get, set)
+
+
+class ColumnAgent(BaseAgent):
+    """ Agent keeping its state in AgentColumns of the island it lives on,
+    and only a reference to its slot in the object. Between leaving one
+    island and arriving at another (and before being born), the state is
+    kept detached, in a dictionary.
+
+    Each access to the state goes through a property, so agents step about
+    twice as slowly as plain Agents - the layout saves memory and lets
+    statistics be computed over whole columns at once.
+    """
+
+    __slots__ = ('columns', 'slot', 'detached')
+
+    x = column('x', tuple)
+    val = column('val', tuple)
+    energy = column('energy')
+    encounter_count = column('encounter_count')
+    dist = column('dist')
+
+    def __init__(self, x, val, energy, env):
+        self.columns = None
+        self.slot = None
+        self.detached = {}
+        super(ColumnAgent, self).__init__(x, val, energy, env)
+
+    def attach(self, columns):
+        self.slot = columns.allocate(self, **self.detached)
+        self.columns = columns
+        self.detached = None
+
+    def detach(self):
+        self.detached = self.columns.release(self.slot)
+        self.columns = None
+        self.slot = None
@@ -1,10 +1,18 @@
 
-from random import choice
-from itertools import ifilter
+import random
+from bisect import bisect_right
+from itertools import ifilter, count, chain
+import numpy as np
 from ..utils import dominates, randVector
+from ..rng import RNG
 from ..genetics import Specimen, mutation, crossover
-from .Agent import Agent
+from ..evaluation import batchEvaluator, wrapEvaluator
+from .Agent import Agent, ColumnAgent
+from .columns import AgentColumns
+from .containers import IndexedSet, SpreadIndex
 from .param_sets import param_sets, default_params
+from .parallel import ParallelRunner
+from .topology import topology
 
 names = [
     'Adam', 'Bartek', 'Ania', 'Pawel', 'Kasia', 'Andrzej', 'Alicja',
@@ -13,25 +21,76 @@ names = [
 ]
 
 
-def pick_name():
-    return choice(names)
+def pick_name(rng=None):
+    return (rng or random).choice(names)
 
 
 class Island(object):
 
-    def __init__(self, energy):
+    def __init__(self, energy, columns=None, rng=None):
+        """ energy  - free energy of the island
+        columns - AgentColumns holding state of the inhabitants, which are
+                  then ColumnAgents, or None if agents keep their own state
+        rng     - stream of random numbers (RNG) used for everything that
+                  happens on the island, random module by default
+
+        When the island is handled by another process, agents travelling to
+        it are collected in the outbound list instead.
+        """
+        self.outbound = None
         self.neighbours = {}
-        self.inhabitants = set()
+        self.costs = []
+        self.destinations = []
+        self.inhabitants = IndexedSet()
+        self.mates = SpreadIndex()
         self.energy = energy
+        self.columns = columns
+        self.rng = rng or random
 
     def add_neighbour(self, island, cost):
+        i = bisect_right(self.costs, cost)
+        self.costs.insert(i, cost)
+        self.destinations.insert(i, island)
         self.neighbours[island] = cost
 
+    def random_destination(self, budget):
+        """ Returns random neighbour among those with travel cost not
+        exceeding budget, or None if there is none. Neighbours are kept
+        sorted by cost, so these form a prefix of the list.
+        """
+        n = bisect_right(self.costs, budget)
+        if n == 0:
+            return None
+        return self.destinations[self.rng.randrange(n)]
+
     def add_agent(self, a):
         self.inhabitants.add(a)
+        if self.columns is not None:
+            a.attach(self.columns)
+        self.mates.update(a)
 
     def remove_agent(self, a):
         self.inhabitants.remove(a)
+        self.mates.discard(a)
+        if self.columns is not None:
+            a.detach()
+
+
+class PopulationView(object):
+    """ Lazy view of agents living on the islands at the moment it was
+    created - agents born, dying or travelling later do not affect it, but
+    their attributes (e.g. energy) are current. Creating it takes time
+    proportional to the number of islands, not agents.
+    """
+
+    def __init__(self, world):
+        self.views = [island.inhabitants.snapshot() for island in world]
+
+    def __len__(self):
+        return sum(len(view) for view in self.views)
+
+    def __iter__(self):
+        return chain.from_iterable(self.views)
 
 
 class Env(object):
@@ -48,35 +107,53 @@ class Env(object):
         self.decided_encounters = 0
         self.departures = 0
 
-    def find_encounters(self, agent):
-        enemies = list(self.island.inhabitants)
-        enemies.remove(agent)
-        return enemies
+    def random_encounter(self, agent):
+        """ Returns random agent of the island other than agent, or None if
+        there is none.
+        """
+        return self.island.inhabitants.choice_other(agent, self.rng)
+
+    def find_mate(self, agent):
+        """ Finds agent willing to reproduce with agent, with the largest
+        spread among those capable of reproduction.
 
-    def find_mates(self, agent):
-        mates = []
-        for a in self.island.inhabitants:
-            if a is not agent and a.can_reproduce():
-                mates.append(a)
-        return mates
+        Returns: mate, or None if there is none
+        """
+        accept = lambda mate: mate.reproduction_offer(agent)
+        return self.island.mates.find(accept, agent)
+
+    def changed(self, agent):
+        """ Invoked when energy, encounter count or distance of an agent
+        changes, to keep the index of mates up to date.
+        """
+        if agent in self.island.inhabitants:
+            self.island.mates.update(agent)
 
     def neighbour_islands(self):
         return self.island.neighbours
 
+    def random_destination(self, agent):
+        """ Returns random neighbour island agent can afford to travel to,
+        staying above the travel threshold, or None if there is none.
+        """
+        return self.island.random_destination(agent.energy - self.travel_threshold)
+
     def accept_energy(self, energy):
         self.island.energy += energy
 
     def reproduce(self, p1, p2):
-        c1, c2 = crossover(p1, p2)
+        c1, c2 = crossover(p1, p2, self.rng)
 
         c1 = self.mutate(c1)
         c2 = self.mutate(c2)
 
-        v1 = self.emas.f(c1.x)
-        v2 = self.emas.f(c2.x)
+        if self.emas.params['deferred_evaluation']:
+            v1 = v2 = None
+        else:
+            v1, v2 = self.emas.evaluate([c1.x, c2.x])
 
-        a1 = Agent(c1.x, v1, 0, self)
-        a2 = Agent(c2.x, v2, 0, self)
+        a1 = self.emas.agent_class(c1.x, v1, 0, self)
+        a2 = self.emas.agent_class(c2.x, v2, 0, self)
 
         e = self.emas.params['init_energy']
 
@@ -91,16 +168,22 @@ class Env(object):
         p1.transfer_energy(a1, e)
         p2.transfer_energy(a2, e)
 
-        a1.name = pick_name()
-        a2.name = pick_name()
+        a1.name = self.emas.pick_name(self.rng)
+        a2.name = self.emas.pick_name(self.rng)
 
-        self.island.add_agent(a1)
-        self.island.add_agent(a2)
+        if v1 is None:
+            self.emas.defer(self, a1)
+            self.emas.defer(self, a2)
+        else:
+            self.island.add_agent(a1)
+            self.island.add_agent(a2)
+            self.emas.born(a1)
+            self.emas.born(a2)
         self.reproductions += 1
 
     def mutate(self, a):
         p = self.emas.params['mutation_probability']
-        return mutation(a, p, self.emas.bounds, self.emas.max_changes)
+        return mutation(a, p, self.emas.bounds, self.emas.max_changes, self.rng)
 
     def winner(self, a, b):
         if dominates(b.val, a.val):
@@ -120,7 +203,10 @@ class Env(object):
         e = self.island.neighbours[destination]
         agent.dissipate_energy(e)
         self.island.remove_agent(agent)
-        destination.add_agent(agent)
+        if destination.outbound is not None:
+            destination.outbound.append(agent)
+        else:
+            destination.add_agent(agent)
         agent.env = self.emas.envs[destination]
 
         self.departures += 1
@@ -128,9 +214,14 @@ class Env(object):
     def died(self, agent):
         agent.dissipate_energy(agent.energy)
         self.island.remove_agent(agent)
+        self.emas.died(agent)
 
         self.deaths += 1
 
+    @property
+    def rng(self):
+        return self.island.rng
+
     @property
     def fight_transfer(self):
         return self.emas.params['fight_transfer']
@@ -152,27 +243,54 @@ class EMAS(object):
     params = default_params
 
     def __init__(self, fs, bounds, ranges, **params):
-        self.f = lambda x: tuple(f(x) for f in fs)
+        self.fbatch = batchEvaluator(fs)
         self.bounds = bounds
         self.ranges = ranges
         self.params = dict(EMAS.params, **params)
+        self.m = len(fs)
+        self.rng = RNG(self.params['seed'])
+
+        storage = self.params['storage']
+        if storage not in ('objects', 'columns'):
+            raise ValueError('Unknown storage: {}'.format(storage))
+        self.agent_class = ColumnAgent if storage == 'columns' else Agent
+
+        self.fbatch, self.executor, self.cache = wrapEvaluator(self.fbatch, self.params)
         s = 0.1
         self.max_changes = [s * (M - m) for m, M in bounds]
         self.world = []
         self.envs = {}
+        self.observers = []
+        self.uids = count()
+        self.newborns = []
 
     def create_world(self):
-        """ Creates fully connected island graph.
+        """ Creates island graph of the kind given by topology parameter
+        (fully connected by default). Travel cost may be a number, or a
+        function of indices of the islands connected.
         """
         size = self.params['world_size']
         cost = self.params['travel_cost']
-
-        self.world = [Island(0) for _ in xrange(size)]
-
-        for a in self.world:
-            for b in self.world:
-                if a is not b:
-                    a.add_neighbour(b, cost)
+        degree = self.params['topology_degree']
+        rewiring = self.params['topology_rewiring']
+        edges = topology(self.params['topology'], size, degree, rewiring, self.rng)
+
+        streams = self.rng.spawn(size)
+        self.world = [Island(0, self.make_columns(), rng) for rng in streams]
+
+        for i, j in sorted(edges):
+            c = cost(i, j) if callable(cost) else cost
+            a, b = self.world[i], self.world[j]
+            a.add_neighbour(b, c)
+            b.add_neighbour(a, c)
+
+    def make_columns(self):
+        """ Creates storage for agents of an island, if state of agents is
+        kept in columns.
+        """
+        if self.params['storage'] == 'columns':
+            return AgentColumns(len(self.bounds), self.m)
+        return None
 
     def populate_world(self):
         """ Fills the islands with population_size randomly chosen individuals.
@@ -183,12 +301,94 @@ class EMAS(object):
         for island in self.world:
             env = Env(island, self)
             self.envs[island] = env
-            for _ in xrange(N):
-                x = randVector(self.bounds)
-                val = self.f(x)
-                agent = Agent(x, val, energy, env)
+            xs = [randVector(self.bounds, island.rng) for _ in xrange(N)]
+            for x, val in zip(xs, self.evaluate(xs)):
+                agent = self.agent_class(x, val, energy, env)
                 island.add_agent(agent)
-                agent.name = pick_name()
+                agent.name = self.pick_name(island.rng)
+                self.born(agent)
+
+    def pick_name(self, rng):
+        """ Returns name for new agent, or None if agents are not named.
+        Names are shared strings, so they take no memory per agent.
+        """
+        if self.params['agent_names']:
+            return pick_name(rng)
+        return None
+
+    def born(self, agent):
+        """ Gives new agent an identifier unique among all the processes,
+        and notifies observers about it.
+        """
+        agent.uid = next(self.uids)
+        for observer in self.observers:
+            observer.born(agent)
+
+    def died(self, agent):
+        """ Notifies observers about death of an agent.
+        """
+        for observer in self.observers:
+            observer.died(agent)
+
+    def defer(self, env, agent):
+        """ Puts newborn agent, whose value is not computed yet, aside until
+        the end of the step. With deferred_evaluation, children are created
+        with the energy they would have otherwise, but join their island only
+        after the values of all the children born during the step have been
+        computed in one batch (by the executor, if there is one). Until then,
+        they do not act, cannot be encountered or chosen as mates, and are
+        not visible to observers. Callbacks always see all of them placed.
+        """
+        self.newborns.append((env, agent))
+
+    def flush_newborns(self):
+        """ Evaluates agents born during the step with deferred evaluation,
+        in a single batch, and puts them on their islands.
+        """
+        if not self.newborns:
+            return
+        newborns, self.newborns = self.newborns, []
+        vals = self.evaluate([agent.x for _, agent in newborns])
+        for (env, agent), val in zip(newborns, vals):
+            agent.val = val
+            env.island.add_agent(agent)
+            self.born(agent)
+
+    def step(self):
+        """ Performs one step of each agent living on some island at the
+        beginning of the step. Agents born during the step do not act, nor
+        do agents removed from their island before their turn. Islands are
+        swept in place, so no list of agents is built or copied.
+        """
+        sweeps = [island.inhabitants.sweep() for island in self.world]
+        for agent in chain.from_iterable(sweeps):
+            agent.step()
+        self.flush_newborns()
+
+    def close(self, wait=True):
+        """ Releases workers used for evaluation, if any. Unless wait is set,
+        pending evaluations are abandoned.
+        """
+        if self.executor is None:
+            return
+        if wait:
+            self.executor.close()
+        else:
+            self.executor.terminate()
+
+    def evaluate(self, xs):
+        """ Computes values of all the points of xs in a single batch.
+
+        Returns: list of tuples of objective values
+        """
+        if not xs:
+            return []
+        return [tuple(val) for val in self.fbatch(np.array(xs))]
+
+    def population(self):
+        """ Returns PopulationView of agents of all the islands.
+        """
+        return PopulationView(self.world)
 
     def agents(self):
         agents = []
@@ -198,17 +398,32 @@ class EMAS(object):
         return agents
 
     def optimize(self, steps, callback=None):
+        try:
+            result = self.run(steps, callback)
+        except:
+            self.close(wait=False)
+            raise
+        self.close()
+        return result
+
+    def run(self, steps, callback):
         self.create_world()
         self.populate_world()
 
+        if self.params['island_workers']:
+            # workers evaluate with pools of their own, the parent only
+            # routes agents, so its pool would sit idle
+            self.close()
+            runner = ParallelRunner(self, self.params['island_workers'])
+            return runner.run(steps, self.params['sync_interval'], callback)
+
         if callback:
-            callback(0, self.agents())
+            callback(0, self.population())
 
         for step in xrange(steps):
-            for agent in self.agents():
-                agent.step()
+            self.step()
             if callback:
-                callback(step + 1, self.agents())
+                callback(step + 1, self.population())
 
         return self.agents()
 
@@ -1,6 +1,8 @@
 
-from ..hypervolume import hypervolume
+from ..hypervolume import hypervolume, estimateHypervolume
+from ..rng import RNG
 from collections import defaultdict
+import numpy as np
 
 
 class Data(object):
@@ -23,7 +25,16 @@ class Stats(object):
 
     bin_count = 10
 
-    def __init__(self, emas, volume):
+    def __init__(self, emas, volume, samples=None, error=None):
+        """ emas    - algorithm to gather statistics of
+        volume  - hypervolume of the Pareto front
+        samples - if given, hypervolume is estimated by sampling that many
+                  points, instead of being computed exactly
+        error   - if given, hypervolume is estimated by sampling until the
+                  relative error is below it. Samples are drawn from a stream
+                  of their own, seeded like emas, so that the run is the same
+                  whether hypervolume is estimated or not.
+        """
         self.emas = emas
         self.volume = volume
 
@@ -34,6 +45,10 @@ class Stats(object):
         self.energy_dist = []
 
         self.hvr = []
+        self.hvr_error = []
+        self.samples = samples
+        self.error = error
+        self.rng = RNG(emas.params['seed'])
         self.refpoint = tuple(r[1] for r in emas.ranges)
 
     @property
@@ -55,7 +70,7 @@ class Stats(object):
         return max(0, min(e, self.bin_count - 1))
 
     def make_bins(self):
-        return [0 for _ in xrange(self.bin_count)]
+        return np.zeros(self.bin_count, dtype=int)
 
     def update(self, step):
         last = self.time[-1] if self.time else -1
@@ -100,18 +115,28 @@ class Stats(object):
             self[island].population.append(island_size)
             population += island_size
 
-            island_energy = 0
-            island_reproduction_capable = 0
-            island_travel_capable = 0
-
-            for agent in island.inhabitants:
-                island_energy += agent.energy
-                if agent.energy >= reproduction_threshold:
-                    island_reproduction_capable += 1
-                if agent.energy >= travel_threshold:
-                    island_travel_capable += 1
-                vals.append(agent.val)
-                bins[self.find_bin(agent)] += 1
+            columns = island.columns
+            if columns is not None:
+                island_energy = columns.total_energy()
+                island_reproduction_capable = np.count_nonzero(
+                    columns.at_least(reproduction_threshold))
+                island_travel_capable = np.count_nonzero(
+                    columns.at_least(travel_threshold))
+                vals.extend(columns.val[columns.live()])
+                bins += columns.energy_histogram(self.bin_count)
+            else:
+                island_energy = 0
+                island_reproduction_capable = 0
+                island_travel_capable = 0
+
+                for agent in island.inhabitants:
+                    island_energy += agent.energy
+                    if agent.energy >= reproduction_threshold:
+                        island_reproduction_capable += 1
+                    if agent.energy >= travel_threshold:
+                        island_travel_capable += 1
+                    vals.append(agent.val)
+                    bins[self.find_bin(agent)] += 1
 
             energy += island_energy
             reproduction_capable += island_reproduction_capable
@@ -137,11 +162,18 @@ class Stats(object):
         self.total.decided_encounters.append(decided_encounters)
         self.total.departures.append(departures)
 
-        vol = hypervolume(self.refpoint, vals)
+        err = 0.0
+        if self.samples or self.error:
+            vol, err, _ = estimateHypervolume(self.refpoint, vals,
+                                              self.samples, self.error,
+                                              rng=self.rng)
+        else:
+            vol = hypervolume(self.refpoint, vals)
         hvr = vol / self.volume
         self.hvr.append(hvr)
+        self.hvr_error.append(err / self.volume)
 
-        self.energy_dist.append(bins)
+        self.energy_dist.append(list(bins))
 
 
     def append(self, step, data, history):
@@ -0,0 +1,112 @@
+
+import numpy as np
+
+
+class AgentColumns(object):
+    """ State of agents living on an island, stored column-wise - one NumPy
+    array per attribute, indexed by slot. Slots of dead (or departed) agents
+    are put on a free list and reused for newborns, and the columns double
+    in size when no free slot is left.
+
+    energy          - energy of each agent
+    x               - genotypes, one row per slot
+    val             - objective values, one row per slot
+    encounter_count - number of encounters of each agent
+    dist            - total distance to agents encountered
+    alive           - mask of occupied slots
+    agents          - agent objects occupying the slots
+    """
+
+    fields = ('x', 'val', 'energy', 'encounter_count', 'dist')
+
+    def __init__(self, dim, m, capacity=16):
+        self.energy = np.zeros(capacity)
+        self.x = np.zeros((capacity, dim))
+        self.val = np.zeros((capacity, m))
+        self.encounter_count = np.zeros(capacity, dtype=int)
+        self.dist = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.agents = [None] * capacity
+        self.free = range(capacity - 1, -1, -1)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def capacity(self):
+        return len(self.energy)
+
+    def grow(self):
+        n = self.capacity
+        for name in self.fields + ('alive',):
+            column = getattr(self, name)
+            bigger = np.zeros((2 * n,) + column.shape[1:], dtype=column.dtype)
+            bigger[:n] = column
+            setattr(self, name, bigger)
+        self.agents.extend([None] * n)
+        self.free.extend(xrange(2 * n - 1, n - 1, -1))
+
+    def allocate(self, agent, x, val, energy, encounter_count=0, dist=0):
+        """ Puts agent with given state in a free slot.
+
+        Returns: slot number
+        """
+        if not self.free:
+            self.grow()
+        slot = self.free.pop()
+        self.x[slot] = x
+        self.val[slot] = val
+        self.energy[slot] = energy
+        self.encounter_count[slot] = encounter_count
+        self.dist[slot] = dist
+        self.alive[slot] = True
+        self.agents[slot] = agent
+        self.size += 1
+        return slot
+
+    def release(self, slot):
+        """ Frees the slot.
+
+        Returns: dict with state of the agent that occupied it
+        """
+        state = {
+            'x': tuple(self.x[slot]),
+            'val': tuple(self.val[slot]),
+            'energy': float(self.energy[slot]),
+            'encounter_count': int(self.encounter_count[slot]),
+            'dist': float(self.dist[slot]),
+        }
+        self.alive[slot] = False
+        self.agents[slot] = None
+        self.free.append(slot)
+        self.size -= 1
+        return state
+
+    def live(self):
+        """ Returns slots occupied by agents.
+        """
+        return np.flatnonzero(self.alive)
+
+    def select(self, mask):
+        """ Returns agents occupying slots where mask is True.
+        """
+        agents = self.agents
+        return [agents[i] for i in np.flatnonzero(mask & self.alive)]
+
+    def total_energy(self):
+        return self.energy[self.alive].sum()
+
+    def at_least(self, threshold):
+        """ Returns mask of live agents with energy at least threshold, i.e.
+        of these for which can_reproduce or can_travel would currently hold.
+        """
+        return self.alive & (self.energy >= threshold)
+
+    def energy_histogram(self, bin_count):
+        """ Counts live agents in bins of width 1 / bin_count, the extreme
+        bins also holding energies outside [0, 1].
+        """
+        bins = (self.energy[self.alive] * bin_count).astype(int)
+        bins = np.clip(bins, 0, bin_count - 1)
+        return np.bincount(bins, minlength=bin_count)
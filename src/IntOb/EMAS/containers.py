@@ -0,0 +1,201 @@
+
+import random
+from heapq import heapify, heappush, heappop
+from itertools import count
+from weakref import ref
+
+
+class SetView(object):
+    """ Snapshot of elements of IndexedSet, sharing the list with the set as
+    long as the set does not change.
+    """
+
+    def __init__(self, items):
+        self.items = items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class IndexedSet(object):
+    """ Set of objects kept in a list along with their positions in it, so
+    that adding, removing (by moving the last element into the hole) and
+    drawing a random element all take constant time.
+
+    Snapshots are taken in constant time - the list is copied only when the
+    set is changed while some snapshot of it is still alive.
+
+    Elements present at some moment can also be swept in place, without
+    any copy - see sweep.
+    """
+
+    def __init__(self, items=()):
+        self.items = []
+        self.positions = {}
+        self.view = None
+        self.cursor = None
+        for item in items:
+            self.add(item)
+
+    def snapshot(self):
+        """ Returns SetView of the current elements, not affected by later
+        changes of the set.
+        """
+        view = self.view() if self.view is not None else None
+        if view is None:
+            view = SetView(self.items)
+            self.view = ref(view)
+        return view
+
+    def sweep(self):
+        """ Returns iterator visiting once each element present at this
+        moment, unaffected by changes of the set made meanwhile - elements
+        removed before their turn are skipped, and elements added are not
+        visited. Only the most recent sweep of the set is valid.
+
+        While sweeping, the list is split into visited elements, unvisited
+        ones and ones added during the sweep, in that order. Removing an
+        element moves the last one of each following part into the hole
+        left in the previous part, so that all the parts stay contiguous.
+        """
+        cursor = self.cursor = [0, len(self.items)]
+        return self.visit(cursor)
+
+    def visit(self, cursor):
+        try:
+            while cursor[0] < cursor[1]:
+                cursor[0] += 1
+                yield self.items[cursor[0] - 1]
+        finally:
+            if self.cursor is cursor:
+                self.cursor = None
+
+    def move(self, src, dst):
+        item = self.items[src]
+        self.items[dst] = item
+        self.positions[item] = dst
+
+    def unshare(self):
+        if self.view is not None:
+            if self.view() is not None:
+                self.items = list(self.items)
+            self.view = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def add(self, item):
+        if item not in self.positions:
+            self.unshare()
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def remove(self, item):
+        hole = self.positions.pop(item)
+        self.unshare()
+        if self.cursor is not None:
+            for k, bound in enumerate(self.cursor):
+                if hole < bound:
+                    self.cursor[k] = bound - 1
+                    if hole != bound - 1:
+                        self.move(bound - 1, hole)
+                    hole = bound - 1
+        last = len(self.items) - 1
+        if hole != last:
+            self.move(last, hole)
+        self.items.pop()
+
+    def discard(self, item):
+        if item in self.positions:
+            self.remove(item)
+
+    def choice(self, rng=None):
+        """ Returns random element, or None if the set is empty.
+        """
+        if not self.items:
+            return None
+        return self.items[(rng or random).randrange(len(self.items))]
+
+    def choice_other(self, item, rng=None):
+        """ Returns random element different from item, which must belong to
+        the set, or None if there is no other element.
+        """
+        n = len(self.items)
+        if n < 2:
+            return None
+        i = (rng or random).randrange(n - 1)
+        if i >= self.positions[item]:
+            i += 1
+        return self.items[i]
+
+
+class SpreadIndex(object):
+    """ Agents capable of reproduction, ordered by decreasing spread. Kept
+    in a heap with lazy deletion - each change pushes a new entry, and
+    entries superseded by later ones are skipped when they reach the top,
+    or dropped when they make up most of the heap.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.entries = {}
+        self.counter = count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, agent):
+        return agent in self.entries
+
+    def update(self, agent):
+        """ Puts agent in the index if it can reproduce, with its current
+        spread, and removes it otherwise.
+        """
+        if agent.can_reproduce():
+            seq = next(self.counter)
+            self.entries[agent] = seq
+            heappush(self.heap, (-agent.spread, seq, agent))
+            if len(self.heap) > 2 * len(self.entries) + 16:
+                self.compact()
+        else:
+            self.discard(agent)
+
+    def discard(self, agent):
+        self.entries.pop(agent, None)
+
+    def compact(self):
+        entries = self.entries
+        self.heap = [e for e in self.heap if entries.get(e[2]) == e[1]]
+        heapify(self.heap)
+
+    def find(self, accept, exclude=None):
+        """ Finds agent with the largest spread, other than exclude, for
+        which accept returns True.
+
+        Returns: agent found, or None
+        """
+        heap = self.heap
+        entries = self.entries
+        popped = []
+        found = None
+        while heap:
+            entry = heappop(heap)
+            _, seq, agent = entry
+            if entries.get(agent) != seq:
+                continue
+            popped.append(entry)
+            if agent is not exclude and accept(agent):
+                found = agent
+                break
+        for entry in popped:
+            heappush(heap, entry)
+        return found
@@ -142,7 +142,7 @@ class SolutionPlot(Plot):
         for island in self.alg.world:
             sx = []
             sy = []
-            for agent in island.inhabitants:
+            for agent in island.inhabitants.snapshot():
                 x, y = agent.val
                 sx.append(x)
                 sy.append(y)
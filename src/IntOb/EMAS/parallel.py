@@ -0,0 +1,225 @@
+
+import random
+from itertools import count
+from multiprocessing import Process, Pipe
+import numpy as np
+
+
+def agent_state(agent):
+    """ Returns picklable state of an agent.
+    """
+    return (agent.uid, agent.name, tuple(agent.x), tuple(agent.val),
+            float(agent.energy), int(agent.encounter_count), float(agent.dist))
+
+
+def restore_agent(emas, state, env, agent=None):
+    """ Sets state of an agent, creating it if none is given. Agent should not
+    live on any island at this point.
+    """
+    uid, name, x, val, energy, encounter_count, dist = state
+    if agent is None:
+        agent = emas.agent_class(x, val, energy, env)
+    agent.env = env
+    agent.x = x
+    agent.val = val
+    agent.energy = energy
+    agent.encounter_count = encounter_count
+    agent.dist = dist
+    agent.uid = uid
+    agent.name = name
+    return agent
+
+
+def island_stats(env):
+    return (env.reproductions, env.deaths, env.encounters,
+            env.decided_encounters, env.departures)
+
+
+def run_worker(emas, index, owned, seed, conn):
+    """ Main loop of a worker process. Worker is forked from the process that
+    populated the world, and steps agents of the islands it owns, treating
+    the rest as remote - agents travelling there are sent back to the
+    parent, which routes them to the owner.
+
+    Worker evaluates the offspring with its own pool of the executor kind,
+    if there is one, started on first use - the parent closes its pool
+    before forking.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    emas.uids = ((index, i) for i in count())
+    emas.observers = []
+
+    for i, island in enumerate(emas.world):
+        if i not in owned:
+            for agent in list(island.inhabitants):
+                island.remove_agent(agent)
+            island.outbound = []
+
+    try:
+        serve(emas, owned, conn)
+    finally:
+        emas.close()
+        conn.close()
+
+
+def serve(emas, owned, conn):
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            # parent is gone
+            break
+        if message is None:
+            break
+        steps, incoming = message
+
+        for i, state in incoming:
+            island = emas.world[i]
+            island.add_agent(restore_agent(emas, state, emas.envs[island]))
+
+        for _ in xrange(steps):
+            emas.step()
+
+        snapshot = {}
+        outbound = []
+        for i, island in enumerate(emas.world):
+            env = emas.envs[island]
+            if i in owned:
+                agents = [agent_state(a) for a in island.inhabitants]
+                snapshot[i] = (island.energy, agents, island_stats(env))
+                env.reset_stats()
+            else:
+                outbound.extend((i, agent_state(a)) for a in island.outbound)
+                del island.outbound[:]
+
+        conn.send((snapshot, outbound))
+
+
+class ParallelRunner(object):
+    """ Runs EMAS with islands distributed over worker processes. Workers
+    step their islands independently for sync_interval steps, and then send
+    back the state of their islands together with agents that left for
+    islands of other workers. These are delivered at the beginning of the
+    next interval - the travel cost is paid on departure, and the rest of
+    their energy is in transit until then.
+
+    Here, the world of the EMAS object is a mirror, updated after each
+    exchange, with agents in transit already put on the islands they head
+    for, so that the total energy is preserved. Observers are notified of
+    agents born and dead since the last exchange, and callbacks are invoked
+    after each exchange, rather than after each step.
+
+    emas    - populated EMAS instance
+    workers - number of worker processes, islands are assigned to them
+              in a round-robin fashion
+    """
+
+    def __init__(self, emas, workers):
+        self.emas = emas
+        size = len(emas.world)
+        self.workers = min(workers, size)
+        self.owner = [i % self.workers for i in xrange(size)]
+        self.registry = dict((a.uid, a) for a in emas.agents())
+
+    def start(self):
+        self.conns = []
+        self.processes = []
+        for w in xrange(self.workers):
+            owned = set(i for i, o in enumerate(self.owner) if o == w)
+            seed = int(self.emas.rng.randint(0, 2 ** 31 - 1))
+            parent, child = Pipe()
+            args = (self.emas, w, owned, seed, child)
+            # not a daemon, so that it can start its own evaluation pool
+            process = Process(target=run_worker, args=args)
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def stop(self):
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except IOError:
+                pass
+        for process in self.processes:
+            process.join()
+
+    def exchange(self, steps, incoming):
+        """ Lets workers run given number of steps.
+
+        Returns: merged snapshot of islands and list of agents in transit
+        """
+        for conn, agents in zip(self.conns, incoming):
+            conn.send((steps, agents))
+
+        snapshot = {}
+        transit = []
+        for conn in self.conns:
+            islands, outbound = conn.recv()
+            snapshot.update(islands)
+            transit.extend(outbound)
+        return snapshot, transit
+
+    def update_mirror(self, snapshot, transit):
+        emas = self.emas
+        states = dict((i, agents) for i, (_, agents, _) in snapshot.iteritems())
+        for i, state in transit:
+            states[i].append(state)
+
+        for island in emas.world:
+            for agent in list(island.inhabitants):
+                island.remove_agent(agent)
+
+        seen = {}
+        for i, island in enumerate(emas.world):
+            energy, _, stats = snapshot[i]
+            env = emas.envs[island]
+            island.energy = energy
+            env.reproductions += stats[0]
+            env.deaths += stats[1]
+            env.encounters += stats[2]
+            env.decided_encounters += stats[3]
+            env.departures += stats[4]
+
+            for state in states[i]:
+                agent = self.registry.get(state[0])
+                agent = restore_agent(emas, state, env, agent)
+                island.add_agent(agent)
+                seen[agent.uid] = agent
+
+        for uid, agent in self.registry.iteritems():
+            if uid not in seen:
+                emas.died(agent)
+        for uid, agent in seen.iteritems():
+            if uid not in self.registry:
+                for observer in emas.observers:
+                    observer.born(agent)
+        self.registry = seen
+
+    def run(self, steps, interval, callback=None):
+        emas = self.emas
+        if callback:
+            callback(0, emas.population())
+
+        self.start()
+        try:
+            incoming = [[] for _ in xrange(self.workers)]
+            step = 0
+            while step < steps:
+                k = min(interval, steps - step)
+                snapshot, transit = self.exchange(k, incoming)
+                self.update_mirror(snapshot, transit)
+
+                incoming = [[] for _ in xrange(self.workers)]
+                for i, state in transit:
+                    incoming[self.owner[i]].append((i, state))
+
+                step += k
+                if callback:
+                    callback(step, emas.population())
+        finally:
+            self.stop()
+
+        return emas.agents()
@@ -46,4 +46,21 @@ param_sets = {
     },
 }
 
-default_params = param_sets['newer_from_sga']
+engine_params = {
+    'cache_size'             : 0,
+    'cache_quantum'          : None,
+    'storage'                : 'objects',
+    'island_workers'         : 0,
+    'sync_interval'          : 1,
+    'deferred_evaluation'    : False,
+    'executor'               : None,
+    'workers'                : None,
+    'chunk_size'             : None,
+    'topology'               : 'complete',
+    'topology_degree'        : 4,
+    'topology_rewiring'      : 0.1,
+    'seed'                   : None,
+    'agent_names'            : True,
+}
+
+default_params = dict(param_sets['newer_from_sga'], **engine_params)
@@ -0,0 +1,125 @@
+
+import random
+from math import sqrt
+
+
+def edge(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+def complete(n):
+    """ Edges of the complete graph on n vertices.
+    """
+    return set((a, b) for a in xrange(n) for b in xrange(a + 1, n))
+
+
+def lattice(n, degree):
+    """ Edges of the ring lattice - each vertex is connected to degree / 2
+    nearest vertices on either side, and for odd degree (and even n) also
+    to the opposite one.
+    """
+    edges = set()
+    for a in xrange(n):
+        for j in xrange(1, degree // 2 + 1):
+            b = (a + j) % n
+            if a != b:
+                edges.add(edge(a, b))
+        if degree % 2 and n % 2 == 0:
+            edges.add(edge(a, (a + n // 2) % n))
+    return edges
+
+
+def ring(n):
+    """ Edges of the cycle on n vertices.
+    """
+    return lattice(n, 2)
+
+
+def torus(n):
+    """ Edges of the 2D torus grid, with as many rows as possible not
+    exceeding the number of columns.
+    """
+    rows = int(sqrt(n))
+    while n % rows:
+        rows -= 1
+    cols = n // rows
+
+    edges = set()
+    for r in xrange(rows):
+        for c in xrange(cols):
+            a = r * cols + c
+            right = r * cols + (c + 1) % cols
+            down = ((r + 1) % rows) * cols + c
+            for b in (right, down):
+                if a != b:
+                    edges.add(edge(a, b))
+    return edges
+
+
+def random_regular(n, degree, swaps=10, rng=None):
+    """ Edges of a random graph with all vertices of given degree, made by
+    randomizing the ring lattice with degree-preserving edge swaps - edges
+    (a, b), (c, d) are replaced with (a, d), (c, b), unless that creates a
+    loop or a duplicate edge.
+    """
+    if degree >= n:
+        raise ValueError('Degree {} too large for {} vertices'.format(degree, n))
+    if n * degree % 2:
+        raise ValueError('No {}-regular graph on {} vertices'.format(degree, n))
+    rng = rng or random
+    edges = lattice(n, degree)
+    pool = list(edges)
+    for _ in xrange(swaps * len(pool)):
+        i = rng.randrange(len(pool))
+        j = rng.randrange(len(pool))
+        a, b = pool[i]
+        c, d = pool[j]
+        if rng.random() < 0.5:
+            c, d = d, c
+        e, f = edge(a, d), edge(c, b)
+        if a == d or c == b or e in edges or f in edges:
+            continue
+        edges.difference_update((pool[i], pool[j]))
+        edges.update((e, f))
+        pool[i], pool[j] = e, f
+    return edges
+
+
+def small_world(n, degree, p, rng=None):
+    """ Edges of the Watts-Strogatz small-world graph - ring lattice with
+    each edge rewired to a random vertex with probability p.
+    """
+    rng = rng or random
+    edges = lattice(n, degree)
+    for a, b in sorted(edges):
+        if rng.random() < p:
+            c = rng.randrange(n)
+            e = edge(a, c)
+            if c != a and e not in edges:
+                edges.remove((a, b))
+                edges.add(e)
+    return edges
+
+
+def topology(name, n, degree=4, rewiring=0.1, rng=None):
+    """ Creates island graph of given kind.
+
+    name     - 'complete', 'ring', 'torus', 'regular' or 'small_world'
+    n        - number of islands
+    degree   - degree of vertices of 'regular' and 'small_world' graphs
+    rewiring - probability of rewiring an edge of 'small_world' graph
+    rng      - source of random numbers (RNG), random module by default
+
+    Returns: set of edges (a, b), a < b
+    """
+    if name == 'complete':
+        return complete(n)
+    elif name == 'ring':
+        return ring(n)
+    elif name == 'torus':
+        return torus(n)
+    elif name == 'regular':
+        return random_regular(n, degree, rng=rng)
+    elif name == 'small_world':
+        return small_world(n, degree, rewiring, rng)
+    raise ValueError('Unknown topology: {}'.format(name))
@@ -1,39 +1,61 @@
 
-from random import shuffle
-from operator import attrgetter
-from .utils import tossCoin, partialSort
-from .genetics import Specimen, randomPopulation, mutation, crossover, select
+from Queue import Queue, Empty
+import numpy as np
+from .genetics import mutationArray, crossoverArray, selectIndices
+from .population import Population
+from .rng import RNG
+from .sorting import sorters, frontsOf, incrementalSort, Fronts
+from .evaluation import batchEvaluator, wrapEvaluator
+from .hypervolume import contributions, reduceFront
 
 
-def crowdedCmp(a, b):
-    return (a.rank, -a.crowd) < (b.rank, -b.crowd)
-
-
-def computeCrowdingDistance(guys, ranges):
+def crowdingDistances(vals, ranks, ranges):
     """ Calculates 'crowding distance' - approximation to the perimeter of the
     hypercube around the value for each point that does not contain any other
-    values.
+    values of its front - within all the fronts at once. Elements of each
+    front are sorted by each objective in a single pass, and neighbours are
+    looked up only among the elements of the same front.
 
-    guys   - elements of the population
+    vals   - N x M matrix of values
+    ranks  - front index of each element
     ranges - extremal values of each evaluation functions
+
+    Returns: vector of crowding distances
     """
-    n = guys[0].value_dim()
+    k, m = vals.shape
+    crowd = np.zeros(k)
+    if k == 0:
+        return crowd
+
+    boundary = np.zeros(k, dtype=bool)
+
+    for i in xrange(m):
+        order = np.lexsort((vals[:, i], ranks))
+        r = ranks[order]
+        v = vals[order, i]
 
-    for guy in guys:
-        guy.crowd = 0
+        first = np.ones(k, dtype=bool)
+        first[1:] = r[1:] != r[:-1]
+        last = np.ones(k, dtype=bool)
+        last[:-1] = first[1:]
+        boundary[order[first | last]] = True
 
-    for i in xrange(0, n):
-        guys.sort(key=lambda guy: guy.val[i])
+        d = float(ranges[i][1] - ranges[i][0])
+        crowd[order[1:-1]] += (v[2:] - v[:-2]) / d
 
-        guys[ 0].crowd += float('+inf')
-        guys[-1].crowd += float('+inf')
+    crowd[boundary] = float('+inf')
+    return crowd
 
-        d = ranges[i][1] - ranges[i][0]
 
-        for j in xrange(len(guys) - 1):
-            x_prev = guys[j - 1].x[i]
-            x_next = guys[j + 1].x[i]
-            guys[j].crowd += (x_next - x_prev) / d
+def crowdingDistance(vals, ranges):
+    """ Crowding distances of elements of a single front.
+
+    vals   - K x M matrix of values of the front elements
+    ranges - extremal values of each evaluation functions
+
+    Returns: vector of crowding distances
+    """
+    return crowdingDistances(vals, np.zeros(len(vals), dtype=int), ranges)
 
 
 class NSGA(object):
@@ -43,104 +65,270 @@ class NSGA(object):
         'crossover_prob': 0.7,
         'population_size': 300,
         'selection_pressure': 1.0,
+        'sorting': 'ens',
+        'incremental_sort': False,
+        'steady_state_batch': 1,
+        'evaluation_timeout': 600,
+        'executor': None,
+        'workers': None,
+        'chunk_size': None,
+        'cache_size': 0,
+        'cache_quantum': None,
+        'truncation': 'crowding',
+        'reference_point': None,
+        'seed': None,
     }
 
     def __init__(self, fs, bounds, ranges, **params):
-        self.f = lambda x: tuple(f(x) for f in fs)
+        self.fbatch = batchEvaluator(fs)
+        self.m = len(fs)
         self.bounds = bounds
         self.ranges = ranges
         self.params = dict(NSGA.defparams, **params)
+        self.sort = sorters[self.params['sorting']]
+
+        if self.params['truncation'] not in ('crowding', 'hypervolume'):
+            raise ValueError('Unknown truncation: {}'.format(self.params['truncation']))
+        refpoint = self.params['reference_point']
+        if refpoint is None:
+            refpoint = [hi for lo, hi in ranges]
+        self.refpoint = np.asarray(refpoint, dtype=float)
+
+        self.fbatch, self.executor, self.cache = wrapEvaluator(self.fbatch, self.params)
+
+        self.rng = RNG(self.params['seed'])
 
         s = 0.1
         self.max_changes = [s * (M - m) for m, M in bounds]
 
 
-    def createOffspring(self, P, N):
+    def createOffspring(self, P, N, candidates=None):
+        """ Creates N offspring of individuals of P, restricted to the ones
+        with given indices, if specified. Parents are mated in pairs - for
+        odd N, the second child of the last pair is dropped.
+        """
+        if candidates is None:
+            candidates = np.arange(len(P))
         p = self.params['selection_pressure']
-        Q = select(P, crowdedCmp, N, p)
-        shuffle(Q)
+        keys = (P.rank[candidates], -P.crowd[candidates])
+        idx = candidates[selectIndices(keys, N + N % 2, p, self.rng)]
+        self.rng.shuffle(idx)
+        X = P.x[idx]
 
         cp = self.params['crossover_prob']
-        # max_pairs = int(cp * N/2)
-        # pairs = randint(0, max_pairs)
-        crossed = 0
+        A = X[0::2]
+        B = X[1::2]
+        crossed = self.rng.random_sample(len(A)) <= cp
+        AB, BA = crossoverArray(A[crossed], B[crossed], self.rng)
+        A[crossed] = AB
+        B[crossed] = BA
 
-        for i in xrange(N/2):
-            if tossCoin(cp):
-                a = Q[2 * i]
-                b = Q[2 * i + 1]
-                ab, ba = crossover(a, b)
-                Q[2 * i] = ab
-                Q[2 * i + 1] = ba
-                crossed += 1
-
-        print 'Crossover for {} pairs'.format(crossed)
+        print 'Crossover for {} pairs'.format(np.count_nonzero(crossed))
 
         mp = self.params['mutation_prob']
-        return [mutation(a, mp, self.bounds, self.max_changes) for a in Q]
+        X = mutationArray(X[:N], mp, self.bounds, self.max_changes, self.rng)
+        return Population(X, m=self.m)
+
+
+    def evaluate(self, P):
+        idx = P.pending()
+        if len(idx) > 0:
+            P.val[idx] = self.fbatch(P.x[idx])
+
+
+    def nonDominatedSort(self, P, ranked=0):
+        """ Sorts P into fronts, setting ranks of its elements.
+
+        P      - population to sort
+        ranked - number of leading elements of P with ranks valid among
+                 themselves, which incremental sort can reuse
+        """
+        if ranked > 0 and self.params['incremental_sort']:
+            P.rank = incrementalSort(P.val, P.rank[:ranked])
+        else:
+            P.rank = self.sort(P.val)
+        return frontsOf(P.rank)
 
 
-    def evaluate(self, guys):
-        for guy in guys:
-            if guy.val is None:
-                guy.val = self.f(guy.x)
+    def computeCrowding(self, P, idx):
+        P.crowd[idx] = crowdingDistances(P.val[idx], P.rank[idx], self.ranges)
 
 
-    def nonDominatedSort(self, guys):
-        fronts = partialSort(guys, Specimen.dominates)
+    def select(self, R, fronts, N):
+        """ Environmental selection - picks N best individuals of R, taking
+        whole fronts as long as they fit and the least crowded ones of the
+        first front that does not. With hypervolume truncation, that front is
+        instead reduced by repeatedly dropping the individual contributing the
+        least hypervolume.
+        """
+        sizes = np.cumsum([len(F) for F in fronts])
+        i = np.searchsorted(sizes, N, side='right')
+        count = sizes[i - 1] if i > 0 else 0
 
-        for rank, front in enumerate(fronts):
-            for guy in front:
-                guy.rank = rank
+        reminder = N - count
+        print 'Whole {} fronts taken, reminder = {}'.format(i, reminder)
 
-        return fronts
+        partial = 1 if reminder > 0 else 0
+        self.computeCrowding(R, np.concatenate(fronts[:i + partial]))
+
+        taken = fronts[:i]
+        if partial:
+            F = fronts[i]
+            if self.params['truncation'] == 'hypervolume':
+                taken.append(F[reduceFront(self.refpoint, R.val[F], reminder)])
+            else:
+                order = np.argsort(R.crowd[F], kind='mergesort')
+                taken.append(F[order[-reminder:]])
+
+        return R.take(np.concatenate(taken))
+
+
+    def close(self, wait=True):
+        """ Releases workers used for evaluation, if any. Unless wait is set,
+        pending evaluations are abandoned.
+        """
+        if self.executor is None:
+            return
+        if wait:
+            self.executor.close()
+        else:
+            self.executor.terminate()
 
 
     def optimize(self, steps, callback=None):
+        try:
+            result = self.run(steps, callback)
+        except:
+            self.close(wait=False)
+            raise
+        self.close()
+        return result
+
+
+    def run(self, steps, callback):
         N = self.params['population_size']
 
-        P = randomPopulation(N, self.bounds)
+        P = Population.random(N, self.bounds, self.m, self.rng)
         self.evaluate(P)
         self.nonDominatedSort(P)
+        self.computeCrowding(P, np.arange(N))
 
-        computeCrowdingDistance(P, self.ranges)
         Q = self.createOffspring(P, N)
 
         for step in xrange(steps):
             R = P + Q
             self.evaluate(R)
-            fronts = self.nonDominatedSort(R)
+            fronts = self.nonDominatedSort(R, len(P))
 
             print 'Fronts: {}'.format(len(fronts))
 
-            Pnext = []
-            i = 0
+            P = self.select(R, fronts, N)
+            Q = self.createOffspring(P, N)
+
+            if callback:
+                callback(step, P)
+
+        return P
 
-            while len(Pnext) + len(fronts[i]) <= N:
-                F = fronts[i]
-                Pnext += F
-                self.evaluate(F)
-                computeCrowdingDistance(F, self.ranges)
-                i += 1
 
-            reminder = N - len(Pnext)
-            print 'Whole {} fronts taken, reminder = {}'.format(i, reminder)
+    def optimizeSteadyState(self, steps, callback=None):
+        """ Steady-state variant of optimize - in each step, a small batch of
+        offspring is inserted into maintained fronts of the population, and
+        as many worst individuals (from the last front, with the smallest
+        crowding distance) are evicted. Crowding distances are recomputed
+        only within the fronts that changed.
 
-            if reminder > 0:
-                F = fronts[i]
-                self.evaluate(F)
-                computeCrowdingDistance(F, self.ranges)
+        With a pool executor, there is a batch in evaluation for each
+        worker, and each step handles whichever batch finishes first, so
+        that workers do not wait for each other. If no batch finishes within
+        evaluation_timeout seconds (e.g. a worker died), RuntimeError is
+        raised.
+        """
+        try:
+            result = self.runSteadyState(steps, callback)
+        except:
+            self.close(wait=False)
+            raise
+        self.close()
+        return result
 
-                F.sort(key=attrgetter('crowd'))
-                Pnext += F[-reminder:]
 
-            P = Pnext
-            Q = self.createOffspring(P, N)
+    def runSteadyState(self, steps, callback):
+        N = self.params['population_size']
+        B = self.params['steady_state_batch']
 
-            if callback:
-                callback(step, P)
+        P = Population.random(N, self.bounds, self.m, self.rng)
+        self.evaluate(P)
+        ranks = self.sort(P.val)
+
+        P = P + Population(np.zeros((B, len(self.bounds))), m=self.m)
+        fronts = Fronts(P.val, ranks)
+        P.rank = fronts.rank
+        for F in frontsOf(ranks):
+            self.computeCrowding(P, F)
+
+        alive = np.ones(N + B, dtype=bool)
+        alive[N:] = False
+        results = Queue()
+
+        def submit():
+            X = self.createOffspring(P, B, np.flatnonzero(alive)).x
+            if self.executor is None:
+                results.put((X, self.fbatch(X), False))
+            elif self.cache is not None and self.cache.covers(X):
+                results.put((X, self.cache(X), False))
+            else:
+                self.executor.submit(X, lambda vals: results.put((X, vals, True)))
+
+        in_flight = self.executor.workers if self.executor is not None else 1
+        in_flight = min(in_flight, steps)
+        for _ in xrange(in_flight):
+            submit()
+
+        timeout = self.params['evaluation_timeout']
+        for step in xrange(steps):
+            try:
+                X, vals, fresh = results.get(timeout=timeout)
+            except Empty:
+                raise RuntimeError('No batch evaluated within {} s'.format(timeout))
+            if isinstance(vals, Exception):
+                raise vals
+            if fresh and self.cache is not None:
+                self.cache.record(X, vals)
+
+            free = np.flatnonzero(~alive)
+            P.x[free] = X
+            P.val[free] = vals
+            alive[free] = True
+
+            fronts.changed.clear()
+            fronts.insertBatch(free)
+
+            for _ in xrange(B):
+                i = self.worst(P, fronts[len(fronts) - 1])
+                fronts.remove(i)
+                alive[i] = False
+
+            for k in fronts.changed:
+                if k < len(fronts):
+                    self.computeCrowding(P, fronts[k])
+
+            if step < steps - in_flight:
+                submit()
 
-        return Pnext
+            if callback:
+                callback(step, P.take(np.flatnonzero(alive)))
 
+        return P.take(np.flatnonzero(alive))
 
 
+    def worst(self, P, F):
+        """ Finds the least crowded individual of the front F, or the one
+        contributing the least hypervolume, depending on truncation mode.
+        """
+        if len(F) == 1:
+            return F[0]
+        if self.params['truncation'] == 'hypervolume':
+            return F[np.argmin(contributions(self.refpoint, P.val[F]))]
+        crowd = crowdingDistance(P.val[F], self.ranges)
+        return F[np.argmin(crowd)]
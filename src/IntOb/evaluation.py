@@ -0,0 +1,241 @@
+
+from collections import OrderedDict
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+import numpy as np
+
+
+class Objectives(tuple):
+    """ Sequence of objective functions of a problem, each mapping a point to
+    a number. Problems able to evaluate many points at once may additionally
+    provide batch evaluator, mapping N x D matrix of points to N x M matrix
+    of their values.
+    """
+
+    def __new__(cls, fs, batch=None):
+        self = super(Objectives, cls).__new__(cls, fs)
+        self.batch = batch
+        return self
+
+
+def pointEvaluator(fs):
+    """ Returns function computing tuple of values of all the objectives at
+    a single point.
+    """
+    return lambda x: tuple(f(x) for f in fs)
+
+
+def batchEvaluator(fs):
+    """ Returns function mapping N x D matrix of points to N x M matrix of
+    their values. Uses batch evaluator of fs, if there is one, and falls
+    back to evaluating points one by one otherwise.
+    """
+    batch = getattr(fs, 'batch', None)
+    if batch is not None:
+        return batch
+
+    f = pointEvaluator(fs)
+    m = len(fs)
+
+    def evaluate(X):
+        vals = np.empty((len(X), m))
+        for i, x in enumerate(X):
+            vals[i] = f(x)
+        return vals
+
+    return evaluate
+
+
+class CachedEvaluator(object):
+    """ Batch evaluator remembering values of recently evaluated points, so
+    that points seen again (e.g. offspring identical to their parents) are
+    not evaluated twice. Points are identified by their coordinates, either
+    exact or rounded to multiples of quantum. When the cache is full, least
+    recently used entries are evicted.
+
+    f       - batch evaluator computing values of points not in the cache
+    size    - maximal number of remembered points
+    quantum - if given, points are considered the same if their coordinates
+              round to the same multiples of it
+    """
+
+    def __init__(self, f, size, quantum=None):
+        self.f = f
+        self.size = size
+        self.quantum = quantum
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def keys(self, X):
+        if self.quantum:
+            K = np.round(X / self.quantum).astype(np.int64)
+        else:
+            K = np.ascontiguousarray(X, dtype=float)
+        return [k.tostring() for k in K]
+
+    def lookup(self, keys):
+        """ Returns list of cached values of keys, None for missing ones.
+        """
+        found = []
+        for k in keys:
+            val = self.entries.pop(k, None)
+            if val is not None:
+                self.entries[k] = val
+            found.append(val)
+        return found
+
+    def covers(self, X):
+        """ Checks whether values of all the points of X are cached.
+        """
+        return all(k in self.entries for k in self.keys(X))
+
+    def record(self, X, vals):
+        """ Stores values of points of X, evaluated outside of the cache.
+        """
+        self.misses += len(X)
+        self.store(self.keys(X), vals)
+
+    def store(self, keys, vals):
+        for k, val in zip(keys, vals):
+            self.entries.pop(k, None)
+            self.entries[k] = val
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def __call__(self, X):
+        if len(X) == 0:
+            return self.f(X)
+
+        keys = self.keys(X)
+        found = self.lookup(keys)
+        missing = OrderedDict()
+        for i, (k, val) in enumerate(zip(keys, found)):
+            if val is None:
+                missing.setdefault(k, i)
+
+        self.misses += len(missing)
+        self.hits += len(X) - len(missing)
+
+        if missing:
+            vals = self.f(X[missing.values()])
+            self.store(missing.keys(), vals)
+            computed = dict(zip(missing.keys(), vals))
+            found = [computed[k] if val is None else val
+                     for k, val in zip(keys, found)]
+
+        return np.array(found)
+
+
+_worker_f = None
+
+
+def _install(f):
+    global _worker_f
+    _worker_f = f
+
+
+def _evaluateChunk(X):
+    return _worker_f(X)
+
+
+def _guarded(task, X):
+    try:
+        return task(X)
+    except Exception as e:
+        return e
+
+
+class PoolEvaluator(object):
+    """ Batch evaluator distributing the work over a pool of workers. Batches
+    are split into chunks of rows, evaluated independently, and the results
+    are collected in order.
+
+    Evaluated function is installed in the worker processes when they are
+    forked, so it does not need to be picklable - lambdas are fine. Only
+    chunks of points and values are sent between processes.
+
+    f          - batch evaluator to parallelize
+    kind       - 'process' or 'thread', the latter being useful only for
+                 functions releasing the GIL
+    workers    - number of workers, defaults to the number of CPUs
+    chunk_size - number of rows evaluated at once by a worker, by default
+                 batches are split into 4 chunks per worker
+    """
+
+    def __init__(self, f, kind='process', workers=None, chunk_size=None):
+        if kind not in ('process', 'thread'):
+            raise ValueError('Unknown executor: {}'.format(kind))
+        self.f = f
+        self.kind = kind
+        self.workers = workers or cpu_count()
+        self.chunk_size = chunk_size
+        self.pool = None
+
+    def start(self):
+        if self.kind == 'process':
+            self.pool = Pool(self.workers, _install, (self.f,))
+            self.task = _evaluateChunk
+        else:
+            self.pool = ThreadPool(self.workers)
+            self.task = self.f
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def terminate(self):
+        """ Stops the workers without waiting for pending tasks, some of
+        which may never finish (e.g. when a worker died).
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def split(self, X):
+        size = self.chunk_size
+        if size is None:
+            size = -(-len(X) // (4 * self.workers))
+        return [X[i:i + size] for i in xrange(0, len(X), size)]
+
+    def submit(self, X, callback):
+        """ Starts evaluating X as a single chunk, without waiting for the
+        result. Values, or the exception raised while computing them, are
+        passed to the callback, invoked from a helper thread of the pool.
+        """
+        if self.pool is None:
+            self.start()
+        self.pool.apply_async(_guarded, (self.task, X), callback=callback)
+
+    def __call__(self, X):
+        if len(X) == 0:
+            return self.f(X)
+        if self.pool is None:
+            self.start()
+        return np.vstack(self.pool.map(self.task, self.split(X), 1))
+
+
+def wrapEvaluator(f, params):
+    """ Wraps batch evaluator in pool and cache requested by the algorithm
+    parameters. Returns tuple (evaluator, executor, cache), the latter two
+    being None unless enabled.
+
+    f      - batch evaluator of the problem
+    params - dict with 'executor', 'workers', 'chunk_size', 'cache_size'
+             and 'cache_quantum' entries
+    """
+    executor = None
+    if params['executor']:
+        executor = PoolEvaluator(f, params['executor'], params['workers'],
+                                 params['chunk_size'])
+        f = executor
+
+    cache = None
+    if params['cache_size']:
+        cache = CachedEvaluator(f, params['cache_size'], params['cache_quantum'])
+        f = cache
+
+    return f, executor, cache
@@ -1,5 +1,7 @@
 
-from random import random, sample
+import random
+import numpy as np
+from .rng import uniforms
 from .utils import dominates, randVector, tossCoin, lerp, clamp
 
 
@@ -7,6 +9,8 @@ class Specimen(object):
     """ Single element of the population
     """
 
+    __slots__ = ('x', 'val', 'rank', 'crowd')
+
     def __init__(self, x):
         self.x = tuple(x)
         self.val = None
@@ -25,16 +29,17 @@ class Specimen(object):
         return dominates(a.val, b.val)
 
 
-def randomPopulation(size, bounds):
+def randomPopulation(size, bounds, rng=None):
     """ Creates random initial population - set of points.
 
     size   - number of points to create
     bounds - bounds for each dimension
+    rng    - source of random numbers (RNG), random module by default
     """
-    return [Specimen(randVector(bounds)) for _ in xrange(size)]
+    return [Specimen(randVector(bounds, rng)) for _ in xrange(size)]
 
 
-def mutation(a, p, bounds, max_changes):
+def mutation(a, p, bounds, max_changes, rng=None):
     """ Mutates each component of the vector with probability p, changing it
     by random amount, uniformly chosen from the symmetric intervals specified
     by max_changes vector, ensuring the result stays inside the region given
@@ -44,31 +49,35 @@ def mutation(a, p, bounds, max_changes):
     p           - probability of mutation
     bounds      - solution domain
     max_changes - maximal acceptable changes due to mutation for each component
+    rng         - source of random numbers (RNG), random module by default
 
     Returns: new, modified specimen
     """
+    n = len(a.x)
+    us = uniforms(rng or random, 2 * n)
     b = []
     for i, x in enumerate(a.x):
-        if tossCoin(p):
+        if us[i] <= p:
             c = max_changes[i]
-            d = lerp(-c, c, random())
+            d = lerp(-c, c, us[n + i])
             m, M = bounds[i]
             x = clamp(x + d, m, M)
         b.append(x)
     return Specimen(b)
 
 
-def crossover(a, b):
+def crossover(a, b, rng=None):
     """ Performs crossover of to specimens, effectively interpolating between
     their components.
 
     a, b - specimens to mate
+    rng  - source of random numbers (RNG), random module by default
     Returns: pair of children
     """
     c1 = []
     c2 = []
-    for x, y in zip(a.x, b.x):
-        u = random()
+    us = uniforms(rng or random, len(a.x))
+    for x, y, u in zip(a.x, b.x, us):
         f = u #pow(2 * u, 1 / (1 + 0.3))
 
         c1.append(0.5 * ((1 - f) * x + (1 + f) * y))
@@ -76,7 +85,41 @@ def crossover(a, b):
     return (Specimen(c1), Specimen(c2))
 
 
-def select(population, compare, N, p):
+def mutationArray(X, p, bounds, max_changes, rng=None):
+    """ Array counterpart of mutation - mutates each component of each row of
+    matrix X independently with probability p.
+
+    X           - N x D matrix of genotypes
+    p           - probability of mutation
+    bounds      - solution domain
+    max_changes - maximal acceptable changes due to mutation for each component
+    rng         - source of random numbers (RNG), numpy.random by default
+
+    Returns: new, modified matrix
+    """
+    rng = rng or np.random
+    c = np.asarray(max_changes, dtype=float)
+    lo, hi = np.transpose(np.asarray(bounds, dtype=float))
+    mutated = rng.random_sample(X.shape) <= p
+    d = lerp(-c, c, rng.random_sample(X.shape))
+    return np.clip(np.where(mutated, X + d, X), lo, hi)
+
+
+def crossoverArray(A, B, rng=None):
+    """ Array counterpart of crossover - performs crossover of corresponding
+    rows of matrices A and B.
+
+    A, B - N x D matrices of genotypes to mate
+    rng  - source of random numbers (RNG), numpy.random by default
+    Returns: pair of matrices of children
+    """
+    f = (rng or np.random).random_sample(A.shape)
+    AB = 0.5 * ((1 - f) * A + (1 + f) * B)
+    BA = 0.5 * ((1 + f) * A + (1 - f) * B)
+    return (AB, BA)
+
+
+def select(population, compare, N, p, rng=None):
     """ Performs selection of N individuals from the population, using binary
     tournament scheme with pressure p. Concretely, pair of individuals is
     drawn randomly from the population, they are compared with specified
@@ -87,14 +130,51 @@ def select(population, compare, N, p):
                  and returns True if the first one is not better than the second
     N          - number of individuals to select
     p          - selection pressure
+    rng        - source of random numbers (RNG), random module by default
     """
+    rng = rng or random
+    n = len(population)
     res = []
     for _ in xrange(N):
-        a, b = sample(population, 2)
+        i = rng.randrange(n)
+        j = (i + 1 + rng.randrange(n - 1)) % n
+        a, b = population[i], population[j]
         if compare(a, b):
             a, b = b, a
         # Here a >= b
-        choosen = a if tossCoin(p) else b
+        choosen = a if tossCoin(p, rng) else b
         res.append(choosen)
     return res
 
+
+def selectIndices(keys, N, p, rng=None):
+    """ Vectorized counterpart of select - performs N binary tournaments at
+    once, comparing individuals by their keys. All the pairs and the coin
+    tosses deciding whether the winner is selected are drawn up front.
+
+    keys - sequence of arrays, indexed by individuals, compared in
+           lexicographic order - individual with smaller key wins
+    N    - number of individuals to select
+    p    - selection pressure
+    rng  - source of random numbers (RNG), numpy.random by default
+
+    Returns: array of indices of selected individuals
+    """
+    rng = rng or np.random
+    n = len(keys[0])
+    if n == 1:
+        # the only individual has no opponent, and wins by default
+        return np.zeros(N, dtype=int)
+    a = rng.randint(n, size=N)
+    b = (a + rng.randint(1, n, size=N)) % n
+
+    a_wins = np.zeros(N, dtype=bool)
+    undecided = np.ones(N, dtype=bool)
+    for key in keys:
+        ka, kb = key[a], key[b]
+        a_wins |= undecided & (ka < kb)
+        undecided &= ka == kb
+
+    winner = np.where(a_wins, a, b)
+    loser = np.where(a_wins, b, a)
+    return np.where(rng.random_sample(N) <= p, winner, loser)
@@ -1,6 +1,13 @@
 
 from operator import mul
-from .utils import weaklyInverslyDominates, inverslyDominates, maximal
+from math import erf, sqrt
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from heapq import heapify, heappush, heappop
+import numpy as np
+from .utils import weaklyInverslyDominates
+from .sorting import nondominated, maximalVectors
+from .rng import RNG
 
 
 def volBetween(a, b):
@@ -60,14 +67,337 @@ def spawns(x, z, v, p, xs):
     return ys
 
 
-def hypervolume(p, xs):
-    """ Computes hypervolume of union of cuboids spanned by p and xs.
+def hypervolume2d(p, xs):
+    """ Computes hypervolume of union of rectangles spanned by p and xs, for
+    two objectives, in O(n log n) time. Points are swept in order of the
+    first coordinate, each adding a strip between its second coordinate
+    and the lowest one seen so far. Points not better than p in both
+    coordinates span nothing.
+
+    p  - reference point
+    xs - solution
+    """
+    xs = np.asarray(xs, dtype=float).reshape(-1, 2)
+    xs = xs[np.all(xs < p, axis=1)]
+    if len(xs) == 0:
+        return 0.0
+
+    xs = xs[np.lexsort((xs[:, 1], xs[:, 0]))]
+    lowest = np.minimum.accumulate(xs[:, 1])
+    previous = np.concatenate(([p[1]], lowest[:-1]))
+    return float(np.sum((p[0] - xs[:, 0]) * (previous - lowest)))
+
+
+class Staircase(object):
+    """ Non-dominated subset of points on a plane, sorted by the first
+    coordinate, along with the area of union of rectangles spanned by them
+    and the reference point p. Points have to be better than p.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.xs = []
+        self.ys = []
+        self.area = 0.0
+
+    def __len__(self):
+        return len(self.xs)
+
+    def dominates(self, x, y):
+        """ Checks whether any point of the staircase weakly dominates (x, y).
+        """
+        j = bisect_right(self.xs, x) - 1
+        return j >= 0 and self.ys[j] <= y
+
+    def add(self, x, y):
+        """ Adds point (x, y) unless it is dominated, removing points it
+        dominates. Area gained is summed over the strips between the first
+        coordinates of removed points, below the staircase.
+
+        Returns: True if the point was added
+        """
+        if self.dominates(x, y):
+            return False
+
+        i = bisect_left(self.xs, x)
+        k = i
+        height = self.ys[i - 1] if i > 0 else self.p[1]
+        left = x
+        while k < len(self.xs) and self.ys[k] >= y:
+            self.area += (self.xs[k] - left) * (height - y)
+            left, height = self.xs[k], self.ys[k]
+            k += 1
+        right = self.xs[k] if k < len(self.xs) else self.p[0]
+        self.area += (right - left) * (height - y)
+
+        self.xs[i:k] = [x]
+        self.ys[i:k] = [y]
+        return True
+
+
+def hypervolume3d(p, xs):
+    """ Computes hypervolume of union of cuboids spanned by p and xs, for
+    three objectives. Points are swept in order of the third coordinate, and
+    the staircase of first two coordinates of the points swept so far is
+    maintained along with its area. That takes O(n log n) comparisons, but
+    the staircase is kept in lists, so each insertion also moves O(n)
+    references - O(n^2) in the worst case, if cheap in practice.
+
+    p  - reference point
+    xs - solution
+    """
+    xs = np.asarray(xs, dtype=float).reshape(-1, 3)
+    xs = xs[np.all(xs < p, axis=1)]
+    xs = xs[np.argsort(xs[:, 2], kind='mergesort')]
+
+    stairs = Staircase(p)
+    volume = 0.0
+    z_next = np.append(xs[1:, 2], p[2])
+
+    for (x, y, z), zn in zip(xs, z_next):
+        stairs.add(x, y)
+        volume += stairs.area * (zn - z)
+
+    return volume
+
+
+def wfg(p, xs):
+    """ Hypervolume of non-dominated points xs, all better than p, by the
+    WFG algorithm. Points are sorted so that the last coordinate gets
+    better, and hypervolume is the sum of exclusive contributions of each
+    point with respect to the following ones. That in turn is the volume
+    of the cuboid of the point less the hypervolume of the following
+    points limited to it, which all share its last coordinate and hence
+    form a problem with one dimension less.
+    """
+    n, d = xs.shape
+    if n == 0:
+        return 0.0
+    elif d == 2:
+        return hypervolume2d(p, xs)
+    elif d == 3:
+        return hypervolume3d(p, xs)
+    elif n == 1:
+        return float(np.prod(p - xs[0]))
+
+    xs = xs[np.argsort(-xs[:, -1], kind='mergesort')]
+    volume = 0.0
+    for k in xrange(n):
+        x = xs[k]
+        limited = nondominated(np.maximum(xs[k + 1:, :-1], x[:-1]))
+        inclusive = np.prod(p[:-1] - x[:-1])
+        volume += (p[-1] - x[-1]) * (inclusive - wfg(p[:-1], limited))
+    return volume
+
+
+def wfgHypervolume(p, xs):
+    """ Computes hypervolume of union of cuboids spanned by p and xs, using
+    the WFG algorithm.
+
+    p  - reference point
+    xs - solution
+    """
+    p = np.asarray(p, dtype=float)
+    xs = np.asarray(xs, dtype=float).reshape(-1, len(p))
+    xs = xs[np.all(xs < p, axis=1)]
+    return wfg(p, nondominated(xs))
+
+
+def contributions2d(p, xs):
+    """ Exclusive contributions for two objectives, in O(n log n) time. Only
+    points of the staircase have non-zero contribution - the rectangle
+    between its neighbours, less the part covered by points dominated by
+    this point alone, which all lie in that rectangle.
+    """
+    contrib = np.zeros(len(xs))
+    idx = np.flatnonzero(np.all(xs < p, axis=1))
+    order = idx[np.lexsort((xs[idx, 1], xs[idx, 0]))]
+    if len(order) == 0:
+        return contrib
+
+    x, y = xs[order, 0], xs[order, 1]
+    lowest = np.minimum.accumulate(y)
+    on = np.ones(len(order), dtype=bool)
+    on[1:] = y[1:] < lowest[:-1]
+
+    sx, sy = x[on], y[on]
+    right = np.append(sx[1:], p[0])
+    top = np.insert(sy[:-1], 0, p[1])
+    stair = np.cumsum(on) - 1
+
+    inside = {}
+    for j in np.flatnonzero(~on):
+        k = stair[j]
+        if y[j] < top[k]:
+            inside.setdefault(k, []).append(xs[order[j]])
+
+    for k, i in enumerate(order[on]):
+        covered = 0.0
+        if k in inside:
+            covered = hypervolume2d((right[k], top[k]), inside[k])
+        contrib[i] = (right[k] - sx[k]) * (top[k] - sy[k]) - covered
+    return contrib
+
+
+def contribution3d(p, x, others):
+    """ Exclusive contribution of x for three objectives. Other points
+    limited to the cuboid of x are swept in order of the third coordinate,
+    and the area of the section of its cuboid they leave uncovered is
+    integrated, until they cover it completely.
+    """
+    limited = np.maximum(others, x)
+    stairs = Staircase(p[:2])
+    for a, b, _ in limited[limited[:, 2] <= x[2]]:
+        stairs.add(a, b)
+
+    above = limited[limited[:, 2] > x[2]]
+    above = above[np.argsort(above[:, 2], kind='mergesort')]
+    section = (p[0] - x[0]) * (p[1] - x[1])
+    volume = 0.0
+    z = x[2]
+    for a, b, c in above:
+        volume += (section - stairs.area) * (c - z)
+        z = c
+        stairs.add(a, b)
+        if stairs.area >= section:
+            return volume
+    return volume + (section - stairs.area) * (p[2] - z)
+
+
+def contribution(p, x, others):
+    """ Computes exclusive hypervolume contribution of point x with respect
+    to the other points, for three or more objectives.
+
+    p      - reference point
+    x      - point better than p
+    others - matrix of the other points
+    """
+    others = others[np.all(others < p, axis=1)]
+    if np.any(np.all(others <= x, axis=1)):
+        return 0.0
+    if len(p) == 3:
+        return contribution3d(p, x, others)
+    return np.prod(p - x) - hypervolume(p, np.maximum(others, x))
+
+
+def contributions(p, xs):
+    """ Computes exclusive hypervolume contribution of each point of xs -
+    the volume dominated by it and by no other point.
+
+    p  - reference point
+    xs - solution
+
+    Returns: vector of contributions
+    """
+    p = np.asarray(p, dtype=float)
+    xs = np.asarray(xs, dtype=float).reshape(-1, len(p))
+    if len(p) == 2:
+        return contributions2d(p, xs)
+
+    contrib = np.zeros(len(xs))
+    for i in np.flatnonzero(np.all(xs < p, axis=1)):
+        contrib[i] = contribution(p, xs[i], np.delete(xs, i, axis=0))
+    return contrib
+
+
+def reduceFront2d(p, xs, n):
+    """ Greedy reduction of mutually non-dominated points, for two
+    objectives. Contribution of a point depends only on its neighbours in
+    order of the first coordinate, so after each removal only these two
+    are updated.
+    """
+    order = np.lexsort((xs[:, 1], xs[:, 0]))
+    x = np.minimum(xs[order, 0], p[0])
+    y = np.minimum(xs[order, 1], p[1])
+    size = len(order)
+    prev = range(-1, size - 1)
+    next = range(1, size + 1)
+    version = [0] * size
+
+    def contribution(i):
+        right = x[next[i]] if next[i] < size else p[0]
+        top = y[prev[i]] if prev[i] >= 0 else p[1]
+        return (right - x[i]) * (top - y[i])
+
+    heap = [(contribution(i), i, 0) for i in xrange(size)]
+    heapify(heap)
+    alive = np.ones(size, dtype=bool)
+
+    for _ in xrange(size - n):
+        c, i, v = heappop(heap)
+        while v != version[i]:
+            c, i, v = heappop(heap)
+        alive[i] = False
+        a, b = prev[i], next[i]
+        if a >= 0:
+            next[a] = b
+        if b < size:
+            prev[b] = a
+        for j in (a, b):
+            if 0 <= j < size:
+                version[j] += 1
+                heappush(heap, (contribution(j), j, version[j]))
+
+    return np.sort(order[alive])
+
+
+def reduceFrontNd(p, xs, n):
+    """ Greedy reduction of mutually non-dominated points, for three or more
+    objectives. Removing a point changes the contribution of another one
+    only if the corner shared by their cuboids is not covered by any third
+    point - contributions of just these points are recomputed.
+    """
+    contrib = contributions(p, xs)
+    alive = np.ones(len(xs), dtype=bool)
+
+    for _ in xrange(len(xs) - n):
+        kept = np.flatnonzero(alive)
+        r = kept[np.argmin(contrib[kept])]
+        alive[r] = False
+        kept = np.flatnonzero(alive)
+
+        corners = np.maximum(xs[kept], xs[r])
+        covered = np.all(xs[kept] <= corners[:, np.newaxis], axis=2)
+        np.fill_diagonal(covered, False)
+        for i in kept[~covered.any(axis=1)]:
+            if np.all(xs[i] < p):
+                alive[i] = False
+                contrib[i] = contribution(p, xs[i], xs[alive])
+                alive[i] = True
+
+    return np.flatnonzero(alive)
+
+
+def reduceFront(p, xs, n):
+    """ Selects n of mutually non-dominated points xs, by repeatedly
+    discarding the one with the least exclusive hypervolume contribution.
+
+    p  - reference point
+    xs - points to select from
+    n  - number of points to keep
+
+    Returns: indices of kept points
+    """
+    p = np.asarray(p, dtype=float)
+    xs = np.asarray(xs, dtype=float).reshape(-1, len(p))
+    if len(p) == 2:
+        return reduceFront2d(p, xs, n)
+
+    return reduceFrontNd(p, xs, n)
+
+
+def cuboidHypervolume(p, xs):
+    """ Computes hypervolume of union of cuboids spanned by p and xs, by
+    decomposing it into disjoint cuboids. The decomposition is exact only
+    for two objectives.
 
     p    - reference point
     xs - solution
     """
     n = len(p)
-    relevant = set(maximal(xs, inverslyDominates))
+    if n != 2:
+        raise ValueError('Cuboid decomposition requires 2 objectives, got {}'.format(n))
+    relevant = set(maximalVectors(xs))
     points = [(x, n) for x in relevant]
     volume = 0
 
@@ -81,3 +411,109 @@ def hypervolume(p, xs):
 
     return volume
 
+
+def hypervolume(p, xs):
+    """ Computes hypervolume of union of cuboids spanned by p and xs.
+
+    p    - reference point
+    xs - solution
+    """
+    if len(p) == 2:
+        return hypervolume2d(p, xs)
+    elif len(p) == 3:
+        return hypervolume3d(p, xs)
+    return wfgHypervolume(p, xs)
+
+
+class Estimate(namedtuple('Estimate', 'volume error samples')):
+    """ Result of hypervolume estimation.
+
+    volume  - estimated hypervolume
+    error   - half-width of the confidence interval around volume
+    samples - number of points sampled
+    """
+
+    @property
+    def low(self):
+        return self.volume - self.error
+
+    @property
+    def high(self):
+        return self.volume + self.error
+
+
+def quantile(confidence):
+    """ Computes z such that standard normal variable lies in [-z, z] with
+    given probability, by bisection.
+    """
+    lo, hi = 0.0, 10.0
+    for _ in xrange(60):
+        z = (lo + hi) / 2
+        if erf(z / sqrt(2)) < confidence:
+            lo = z
+        else:
+            hi = z
+    return (lo + hi) / 2
+
+
+def dominatedSamples(xs, S, block=256):
+    """ Checks which rows of S are dominated by some point of xs, comparing
+    blocks of points at once.
+    """
+    hit = np.zeros(len(S), dtype=bool)
+    for i in xrange(0, len(xs), block):
+        X = xs[i:i + block]
+        hit |= np.any(np.all(X[np.newaxis] <= S[:, np.newaxis], axis=2), axis=1)
+    return hit
+
+
+def estimateHypervolume(p, xs, samples=100000, error=None, confidence=0.95,
+                        batch=10000, max_samples=10000000, rng=None):
+    """ Estimates hypervolume by sampling points uniformly from the box
+    between the best coordinates of xs and p, and counting the fraction
+    of them dominated by xs. Meant for many objectives, where the exact
+    algorithms are too slow.
+
+    p           - reference point
+    xs          - solution
+    samples     - number of points to sample, if no error target is given
+    error       - target relative error - if given, points are sampled in
+                  batches until the confidence interval is narrow enough
+    confidence  - probability that the volume lies in the interval
+    batch       - number of points sampled at once
+    max_samples - limit of points sampled when aiming for given error
+    rng         - source of samples (RNG), unseeded one by default
+
+    Returns: Estimate
+    """
+    if samples is None and error is None:
+        raise ValueError('Either samples or error has to be given')
+    if rng is None:
+        rng = RNG()
+
+    p = np.asarray(p, dtype=float)
+    xs = np.asarray(xs, dtype=float).reshape(-1, len(p))
+    xs = xs[np.all(xs < p, axis=1)]
+    if len(xs) == 0:
+        return Estimate(0.0, 0.0, 0)
+
+    xs = nondominated(xs)
+    lo = xs.min(axis=0)
+    box = np.prod(p - lo)
+    z = quantile(confidence)
+
+    limit = samples if error is None else max_samples
+    n = hits = 0
+    while n < limit:
+        k = min(batch, limit - n)
+        S = lo + (p - lo) * rng.random_sample((k, len(p)))
+        hits += np.count_nonzero(dominatedSamples(xs, S))
+        n += k
+
+        f = float(hits) / n
+        half = z * box * sqrt(f * (1 - f) / n)
+        if error is not None and 0 < f and half <= error * f * box:
+            break
+
+    return Estimate(f * box, half, n)
+
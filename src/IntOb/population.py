@@ -0,0 +1,84 @@
+
+import numpy as np
+from .genetics import Specimen
+
+
+class Population(object):
+    """ Population stored as a structure of arrays - one row per individual.
+
+    x     - N x D matrix of genotypes
+    val   - N x M matrix of objective values, rows not evaluated yet are NaN
+    rank  - index of the front each individual belongs to
+    crowd - crowding distance of each individual
+    """
+
+    def __init__(self, x, val=None, m=None):
+        self.x = np.array(x, dtype=float, ndmin=2)
+        n = len(self.x)
+        if val is None:
+            val = np.empty((n, m))
+            val.fill(np.nan)
+        self.val = np.array(val, dtype=float, ndmin=2)
+        self.rank = np.zeros(n, dtype=int)
+        self.crowd = np.zeros(n)
+
+    @staticmethod
+    def random(size, bounds, m, rng=None):
+        """ Creates random population, with genotypes distributed uniformly
+        in the region given by bounds, and no values computed.
+
+        size   - number of individuals to create
+        bounds - bounds for each dimension
+        m      - number of objectives
+        rng    - source of random numbers (RNG), numpy.random by default
+        """
+        rng = rng or np.random
+        lo, hi = np.transpose(np.asarray(bounds, dtype=float))
+        x = lo + (hi - lo) * rng.random_sample((size, len(bounds)))
+        return Population(x, m=m)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __add__(self, other):
+        P = Population(np.vstack((self.x, other.x)),
+                       np.vstack((self.val, other.val)))
+        P.rank = np.concatenate((self.rank, other.rank))
+        P.crowd = np.concatenate((self.crowd, other.crowd))
+        return P
+
+    def __iter__(self):
+        return (self.specimen(i) for i in xrange(len(self)))
+
+    def domain_dim(self):
+        return self.x.shape[1]
+
+    def value_dim(self):
+        return self.val.shape[1]
+
+    def pending(self):
+        """ Returns indices of the individuals that have not been evaluated.
+        """
+        return np.flatnonzero(np.isnan(self.val).any(axis=1))
+
+    def take(self, idx):
+        """ Returns new population consisting of individuals with specified
+        indices (copied).
+        """
+        P = Population(self.x[idx], self.val[idx])
+        P.rank = self.rank[idx]
+        P.crowd = self.crowd[idx]
+        return P
+
+    def specimen(self, i):
+        """ Returns i-th individual as a standalone Specimen object.
+        """
+        s = Specimen(self.x[i])
+        if not np.isnan(self.val[i]).any():
+            s.val = tuple(self.val[i])
+        s.rank = self.rank[i]
+        s.crowd = self.crowd[i]
+        return s
+
+    def specimens(self):
+        return list(self)
@@ -1,16 +1,25 @@
 
 from itertools import repeat
 from math import sqrt, sin, pi
+import numpy as np
+from .evaluation import Objectives
 
 
 g = lambda x: 1 + 9 * sum(x[1:]) / float(len(x) - 1)
+G = lambda X: 1 + 9 * X[:, 1:].sum(axis=1) / float(X.shape[1] - 1)
+
+
+def zdt1Batch(X):
+    f1 = X[:, 0]
+    GX = G(X)
+    return np.column_stack((f1, GX * (1 - np.sqrt(f1 / GX))))
 
 
 def ZDT1():
-    F = (
+    F = Objectives((
         lambda x: x[0],
         lambda x: g(x) * (1 - sqrt(x[0] / g(x)))
-    )
+    ), batch=zdt1Batch)
     n = 3
     bounds = tuple(repeat((0, 1), n))
     volume = 2./3 + 9
@@ -18,11 +27,17 @@ def ZDT1():
     return (F, bounds, ranges, volume)
 
 
+def zdt2Batch(X):
+    f1 = X[:, 0]
+    GX = G(X)
+    return np.column_stack((f1, GX * (1 - (f1 / GX)**2)))
+
+
 def ZDT2():
-    F = (
+    F = Objectives((
         lambda x: x[0],
         lambda x: g(x) * (1 - (x[0] / g(x))**2)
-    )
+    ), batch=zdt2Batch)
     n = 3
     bounds = tuple(repeat((0, 1), n))
     volume = 1./3 + 9
@@ -30,11 +45,18 @@ def ZDT2():
     return (F, bounds, ranges, volume)
 
 
+def zdt3Batch(X):
+    f1 = X[:, 0]
+    GX = G(X)
+    R = f1 / GX
+    return np.column_stack((f1, 0.5 * (1 + GX * (1 - np.sqrt(R) - R * np.sin(10*pi*f1)))))
+
+
 def ZDT3():
-    F = (
+    F = Objectives((
         lambda x: x[0],
         lambda x: 0.5 * (1 + g(x) * (1 - sqrt(x[0]/g(x)) - x[0]/g(x) * sin(10*pi*x[0])))
-    )
+    ), batch=zdt3Batch)
     n = 3
     bounds = tuple(repeat((0, 1), n))
     ranges = [(0, 1), (0, 10)]
@@ -0,0 +1,84 @@
+
+import numpy as np
+
+
+class RNG(object):
+    """ Explicitly seeded source of random numbers, to be passed to the
+    stochastic parts of the algorithms instead of using the global state of
+    random and numpy.random modules. Supports the subset of interface of
+    both these modules used here - scalar variates are served from a block
+    of uniform variates drawn in bulk, arrays are drawn directly.
+
+    Independent streams (e.g. one per island or worker) are created with
+    spawn, so that each of them is reproducible regardless of how the work
+    is interleaved.
+
+    seed  - seed of the stream, None for seeding from the OS
+    block - number of uniform variates drawn at once
+    """
+
+    def __init__(self, seed=None, block=1024):
+        self.seed = seed
+        self.state = np.random.RandomState(seed)
+        self.block_size = block
+        self.buffer = []
+        self.pos = 0
+
+    def spawn(self, n):
+        """ Creates n independent streams, seeded from this one.
+        """
+        seeds = self.state.randint(0, 2 ** 31 - 1, size=n)
+        return [RNG(int(seed), self.block_size) for seed in seeds]
+
+    def refill(self):
+        self.buffer = self.state.random_sample(self.block_size).tolist()
+        self.pos = 0
+
+    def random(self):
+        """ Returns uniform variate from [0, 1).
+        """
+        if self.pos == len(self.buffer):
+            self.refill()
+        u = self.buffer[self.pos]
+        self.pos += 1
+        return u
+
+    def block(self, n):
+        """ Returns list of n uniform variates from [0, 1).
+        """
+        us = self.buffer[self.pos:self.pos + n]
+        self.pos += len(us)
+        while len(us) < n:
+            self.refill()
+            k = min(n - len(us), self.block_size)
+            us.extend(self.buffer[:k])
+            self.pos = k
+        return us
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+    def randrange(self, n):
+        return int(self.random() * n)
+
+    def choice(self, seq):
+        return seq[self.randrange(len(seq))]
+
+    def shuffle(self, xs):
+        self.state.shuffle(xs)
+
+    def random_sample(self, size=None):
+        return self.state.random_sample(size)
+
+    def randint(self, low, high=None, size=None):
+        return self.state.randint(low, high, size)
+
+
+def uniforms(rng, n):
+    """ Returns list of n uniform variates from [0, 1), drawn in bulk if rng
+    supports it.
+    """
+    block = getattr(rng, 'block', None)
+    if block is not None:
+        return block(n)
+    return [rng.random() for _ in xrange(n)]
@@ -0,0 +1,580 @@
+
+from bisect import bisect_left, bisect_right
+import numpy as np
+from .utils import partialSort, dominates
+
+
+def lexOrder(vals):
+    """ Returns permutation sorting rows of vals lexicographically (first
+    column most significant).
+    """
+    return np.lexsort(vals.T[::-1])
+
+
+def uniqueRows(vals):
+    """ Collapses identical rows of vals.
+
+    Returns: pair (U, inverse), where U is a matrix of distinct rows sorted
+             lexicographically, and U[inverse] == vals
+    """
+    order = lexOrder(vals)
+    sorted_vals = vals[order]
+    new = np.ones(len(vals), dtype=bool)
+    new[1:] = np.any(sorted_vals[1:] != sorted_vals[:-1], axis=1)
+    inverse = np.empty(len(vals), dtype=int)
+    inverse[order] = np.cumsum(new) - 1
+    return sorted_vals[new], inverse
+
+
+def frontsOf(ranks):
+    """ Groups indices by rank.
+
+    Returns: list of index arrays, i-th of which holds indices of elements
+             with rank i, in increasing order
+    """
+    if len(ranks) == 0:
+        return []
+    order = np.argsort(ranks, kind='mergesort')
+    bounds = np.searchsorted(ranks[order], np.arange(ranks.max() + 2))
+    return [order[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def naiveSort(vals):
+    """ Reference implementation - Deb's fast non-dominated sort, comparing
+    each pair of points.
+
+    vals - N x M matrix of values (minimized)
+    Returns: vector of ranks (front indices)
+    """
+    less = lambda i, j: dominates(vals[i], vals[j])
+    ranks = np.zeros(len(vals), dtype=int)
+    for rank, front in enumerate(partialSort(range(len(vals)), less)):
+        ranks[front] = rank
+    return ranks
+
+
+def sweepSort(vals):
+    """ Non-dominated sort for two objectives in O(N log N) time. Points are
+    swept in lexicographic order, and each one is put on the first front
+    whose smallest second objective is greater than its own.
+
+    vals - N x 2 matrix of values (minimized)
+    Returns: vector of ranks (front indices)
+    """
+    if vals.shape[1] != 2:
+        raise ValueError('Sweep sort needs exactly 2 objectives')
+
+    U, inverse = uniqueRows(vals)
+    ranks = np.empty(len(U), dtype=int)
+    last = []
+
+    for i, y in enumerate(U[:, 1]):
+        k = bisect_right(last, y)
+        if k == len(last):
+            last.append(y)
+        else:
+            last[k] = y
+        ranks[i] = k
+
+    return ranks[inverse]
+
+
+class _Staircase(object):
+    """ Set of (value, rank) pairs supporting queries for the highest rank
+    among pairs with value not greater than given one. Only pairs that can
+    be the answer to some query are kept - both values and ranks increase.
+    """
+
+    def __init__(self):
+        self.vals = []
+        self.ranks = []
+
+    def query(self, v):
+        i = bisect_right(self.vals, v)
+        return self.ranks[i - 1] if i > 0 else -1
+
+    def add(self, v, r):
+        if self.query(v) >= r:
+            return
+        i = bisect_left(self.vals, v)
+        j = i
+        while j < len(self.vals) and self.ranks[j] <= r:
+            j += 1
+        self.vals[i:j] = [v]
+        self.ranks[i:j] = [r]
+
+
+class _DivideAndConquer(object):
+    """ Jensen's divide-and-conquer non-dominated sort, in the version of
+    Fortin et al. handling points with equal objective values. Operates
+    on distinct points sorted lexicographically, which are referred to by
+    position, and sets of positions are always kept in increasing order.
+    """
+
+    def __init__(self, U):
+        self.U = U
+        self.ranks = np.zeros(len(U), dtype=int)
+
+    def run(self):
+        S = np.arange(len(self.U))
+        m = self.U.shape[1]
+        if m == 1:
+            self.ranks[:] = S
+        else:
+            self.helperA(S, m)
+        return self.ranks
+
+    def weaklyBetter(self, l, h, k):
+        return np.all(self.U[l, :k] <= self.U[h, :k])
+
+    def bruteForce(self, L, H, k):
+        for h in H:
+            for l in L:
+                if self.weaklyBetter(l, h, k):
+                    self.ranks[h] = max(self.ranks[h], self.ranks[l] + 1)
+
+    def helperA(self, S, k):
+        """ Computes ranks within S, considering only first k objectives.
+        """
+        if len(S) < 2:
+            return
+        elif len(S) == 2:
+            self.bruteForce(S[:1], S[1:], k)
+        elif k == 2:
+            self.sweepA(S)
+        else:
+            v = self.U[S, k - 1]
+            if v.min() == v.max():
+                self.helperA(S, k - 1)
+            else:
+                L, H = self.splitA(S, v)
+                self.helperA(L, k)
+                self.helperB(L, H, k - 1)
+                self.helperA(H, k)
+
+    def helperB(self, L, H, k):
+        """ Updates ranks of H using L, whose elements are known not to be
+        worse than these of H on objectives past the k-th.
+        """
+        if len(L) == 0 or len(H) == 0:
+            return
+        elif len(L) == 1 or len(H) == 1:
+            self.bruteForce(L, H, k)
+        elif k == 2:
+            self.sweepB(L, H)
+        else:
+            vl = self.U[L, k - 1]
+            vh = self.U[H, k - 1]
+            if vl.max() <= vh.min():
+                self.helperB(L, H, k - 1)
+            elif vl.min() <= vh.max():
+                m = np.median(np.concatenate((vl, vh)))
+                L1, L2 = L[vl <= m], L[vl > m]
+                H1, H2 = H[vh < m], H[vh >= m]
+                if len(L1) + len(H1) == len(L) + len(H) or \
+                   len(L2) + len(H2) == len(L) + len(H):
+                    self.bruteForce(L, H, k)
+                else:
+                    self.helperB(L1, H1, k)
+                    self.helperB(L1, H2, k - 1)
+                    self.helperB(L2, H2, k)
+
+    def splitA(self, S, v):
+        """ Splits S by median of v. Ties are broken by position, so that no
+        element of the upper part precedes lexicographically, and thus can
+        dominate, an element of the lower part.
+        """
+        m = np.median(v)
+        lower = v < m
+        ties = np.flatnonzero(v == m)
+        n = len(S) // 2 - np.count_nonzero(lower)
+        lower[ties[:max(n, 0)]] = True
+        return S[lower], S[~lower]
+
+    def sweepA(self, S):
+        T = _Staircase()
+        for s in S:
+            y = self.U[s, 1]
+            self.ranks[s] = max(self.ranks[s], T.query(y) + 1)
+            T.add(y, self.ranks[s])
+
+    def sweepB(self, L, H):
+        T = _Staircase()
+        i = 0
+        for h in H:
+            while i < len(L) and L[i] < h:
+                T.add(self.U[L[i], 1], self.ranks[L[i]])
+                i += 1
+            self.ranks[h] = max(self.ranks[h], T.query(self.U[h, 1]) + 1)
+
+
+def divideAndConquerSort(vals):
+    """ Non-dominated sort in O(N log^(M-1) N) time, using Jensen's
+    divide-and-conquer approach generalized by Fortin et al.
+
+    vals - N x M matrix of values (minimized)
+    Returns: vector of ranks (front indices)
+    """
+    if len(vals) == 0:
+        return np.zeros(0, dtype=int)
+    U, inverse = uniqueRows(vals)
+    return _DivideAndConquer(U).run()[inverse]
+
+
+def ensSort(vals):
+    """ Efficient Non-dominated Sort with binary search (ENS-BS) of Zhang et
+    al. Points are processed in lexicographic order, so that no point can
+    be dominated by any of the following ones, and each is put on the first
+    front containing none of its dominators, found by binary search.
+
+    vals - N x M matrix of values (minimized)
+    Returns: vector of ranks (front indices)
+    """
+    order = lexOrder(vals)
+    ranks = np.empty(len(vals), dtype=int)
+    fronts = []
+    sizes = []
+
+    def dominated(k, v):
+        F = fronts[k][:sizes[k]]
+        return np.any(np.all(F <= v, axis=1) & np.any(F < v, axis=1))
+
+    for i in order:
+        v = vals[i]
+        lo, hi = 0, len(fronts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if dominated(mid, v):
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo == len(fronts):
+            fronts.append(np.empty((4, vals.shape[1])))
+            sizes.append(0)
+        elif sizes[lo] == len(fronts[lo]):
+            fronts[lo] = np.resize(fronts[lo], (2 * sizes[lo], vals.shape[1]))
+
+        fronts[lo][sizes[lo]] = v
+        sizes[lo] += 1
+        ranks[i] = lo
+
+    return ranks
+
+
+def dominatedMask(A, B):
+    """ Returns mask of rows of B dominated by any row of A.
+    """
+    A = A[:, np.newaxis]
+    B = B[np.newaxis]
+    dominated = (A <= B).all(axis=2) & (A < B).any(axis=2)
+    return dominated.any(axis=0)
+
+
+def _nondominated2d(vals, unique):
+    order = np.lexsort((vals[:, 1], vals[:, 0]))
+    x, y = vals[order, 0], vals[order, 1]
+    lowest = np.minimum.accumulate(y)
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = y[1:] < lowest[:-1]
+    if not unique:
+        # copies of a kept point directly follow it in lexicographic order
+        same = np.zeros(len(order), dtype=bool)
+        same[1:] = (x[1:] == x[:-1]) & (y[1:] == y[:-1])
+        start = np.maximum.accumulate(np.where(same, 0, np.arange(len(order))))
+        keep = keep[start]
+    mask = np.zeros(len(vals), dtype=bool)
+    mask[order[keep]] = True
+    return mask
+
+
+def _dominatedBy(A, B, unique, earlier):
+    A = A[:, np.newaxis]
+    B = B[np.newaxis]
+    dominated = (A < B).any(axis=2)
+    if unique:
+        # among equal points, only the first one is kept
+        dominated |= earlier
+    dominated &= (A <= B).all(axis=2)
+    return dominated.any(axis=0)
+
+
+def _nondominatedBlocks(vals, unique, block):
+    order = lexOrder(vals)
+    kept = np.empty((0, vals.shape[1]))
+    mask = np.zeros(len(vals), dtype=bool)
+
+    for i in xrange(0, len(order), block):
+        idx = order[i:i + block]
+        idx = idx[~_dominatedBy(kept, vals[idx], unique, True)]
+        B = vals[idx]
+        earlier = np.arange(len(B))[:, np.newaxis] < np.arange(len(B))
+        idx = idx[~_dominatedBy(B, B, unique, earlier)]
+        mask[idx] = True
+        kept = np.vstack((kept, vals[idx]))
+
+    return mask
+
+
+def nondominatedMask(vals, unique=False, block=64):
+    """ Finds points not dominated by any other one. For two objectives,
+    points are swept in lexicographic order, keeping those below all the
+    previous ones. Otherwise points are processed in blocks, in
+    lexicographic order, so that each block needs only be compared with
+    non-dominated points of previous blocks, and with itself.
+
+    vals   - N x M matrix of values (minimized)
+    unique - if True, only one of each group of equal points is kept
+    block  - number of points compared at once
+
+    Returns: boolean mask of non-dominated points
+    """
+    vals = np.asarray(vals, dtype=float)
+    if len(vals) == 0:
+        return np.zeros(0, dtype=bool)
+    if vals.shape[1] == 2:
+        return _nondominated2d(vals, unique)
+    return _nondominatedBlocks(vals, unique, block)
+
+
+def nondominated(xs):
+    """ Removes points of xs (weakly) dominated by other ones, leaving one of
+    each group of equal points.
+
+    xs - N x M matrix of points
+    """
+    return xs[nondominatedMask(xs, unique=True)]
+
+
+def maximalVectors(xs):
+    """ Fast counterpart of utils.maximal(xs, inverslyDominates) - finds
+    vectors of xs not dominated by any other one (minimization).
+
+    xs - sequence of vectors of the same length
+    Returns: list of non-dominated elements of xs, in their original order
+    """
+    xs = list(xs)
+    if not xs:
+        return []
+    mask = nondominatedMask(xs)
+    return [x for x, keep in zip(xs, mask) if keep]
+
+
+class _Front(object):
+    """ Growable set of point indices along with their values and their
+    bounding box, used to skip dominance tests that cannot succeed.
+    """
+
+    def __init__(self, idx, vals):
+        self.idx = np.array(idx, dtype=int)
+        self.vals = np.array(vals, dtype=float, ndmin=2)
+        self.size = len(self.idx)
+        self.lo = self.vals.min(axis=0)
+        self.hi = self.vals.max(axis=0)
+
+    @property
+    def members(self):
+        return self.idx[:self.size]
+
+    @property
+    def values(self):
+        return self.vals[:self.size]
+
+    def extend(self, idx, vals):
+        n = self.size + len(idx)
+        if n > len(self.idx):
+            capacity = max(2 * len(self.idx), n)
+            self.idx = np.resize(self.idx, capacity)
+            self.vals = np.resize(self.vals, (capacity, self.vals.shape[1]))
+        empty = self.size == 0
+        self.idx[self.size:n] = idx
+        self.vals[self.size:n] = vals
+        self.size = n
+        if empty:
+            self.lo = vals.min(axis=0)
+            self.hi = vals.max(axis=0)
+        else:
+            self.lo = np.minimum(self.lo, vals.min(axis=0))
+            self.hi = np.maximum(self.hi, vals.max(axis=0))
+
+    def keep(self, mask):
+        n = np.count_nonzero(mask)
+        self.idx[:n] = self.members[mask]
+        self.vals[:n] = self.values[mask]
+        self.size = n
+        if n > 0:
+            self.lo = self.values.min(axis=0)
+            self.hi = self.values.max(axis=0)
+
+
+class Fronts(object):
+    """ Partition of a set of points into non-domination fronts, maintained
+    as points are inserted and removed. Each front is searched with
+    vectorized dominance tests, so inserting a point costs a binary search
+    over fronts plus checks against the fronts its arrival pushes elements
+    out of, and a batch of points is inserted in a single pass over fronts.
+    Indices of fronts modified since the last reset are collected in
+    'changed'.
+
+    vals  - matrix of values of the points, rows of which are referred to by
+            index
+    ranks - valid ranks of the first len(ranks) points, the rest are not
+            inserted yet
+    """
+
+    def __init__(self, vals, ranks):
+        self.vals = vals
+        self.rank = np.empty(len(vals), dtype=int)
+        self.rank.fill(-1)
+        self.rank[:len(ranks)] = ranks
+        self.fronts = [_Front(F, vals[F]) for F in frontsOf(np.asarray(ranks))]
+        self.changed = set()
+
+    def __len__(self):
+        return len(self.fronts)
+
+    def __getitem__(self, k):
+        return self.fronts[k].members
+
+    def isDominated(self, k, v):
+        """ Checks whether any element of k-th front dominates v.
+        """
+        F = self.fronts[k]
+        if (v < F.lo).any():
+            return False
+        A = F.values
+        return ((A <= v).all(axis=1) & (A < v).any(axis=1)).any()
+
+    def dominatedBy(self, k, T):
+        """ Returns mask of elements of k-th front dominated by any element
+        of T.
+        """
+        F = self.fronts[k]
+        B = self.vals[T]
+        if F.size == 0 or (B.min(axis=0) > F.hi).any():
+            return np.zeros(F.size, dtype=bool)
+        return dominatedMask(B, F.values)
+
+    def find(self, v):
+        """ Finds index of the first front containing no dominators of v.
+        Since any dominator of v has a dominator in each previous front, the
+        fronts containing dominators of v precede all the others.
+        """
+        lo, hi = 0, len(self.fronts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.isDominated(mid, v):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def insert(self, i):
+        """ Inserts i-th point. Elements of its front dominated by it move one
+        front down, pushing out elements dominated by them, and so on.
+        """
+        k = self.find(self.vals[i])
+        moving = np.array([i])
+
+        while len(moving) > 0:
+            self.rank[moving] = k
+            self.changed.add(k)
+            if k == len(self.fronts):
+                self.fronts.append(_Front(moving, self.vals[moving]))
+                break
+
+            F = self.fronts[k]
+            dominated = self.dominatedBy(k, moving)
+            pushed = F.members[dominated]
+            if len(pushed) > 0:
+                F.keep(~dominated)
+            F.extend(moving, self.vals[moving])
+            moving = pushed
+            k += 1
+
+    def insertBatch(self, idx):
+        """ Inserts points with given indices at once, front by front. Since
+        each element of a later front has a dominator in the k-th one, the
+        new k-th front consists of the non-dominated ones among the elements
+        of the old one and the points moving down from previous fronts -
+        found with a single nondominatedMask call. Points moving past the
+        last front are sorted among themselves.
+        """
+        moving = np.asarray(idx, dtype=int)
+        if len(moving) == 1:
+            self.insert(moving[0])
+            return
+
+        k = 0
+        while len(moving) > 0 and k < len(self.fronts):
+            F = self.fronts[k]
+            members = np.concatenate((F.members, moving))
+            keep = nondominatedMask(self.vals[members])
+            if not keep[:F.size].all() or keep[F.size:].any():
+                settled = moving[keep[F.size:]]
+                F.keep(keep[:F.size])
+                F.extend(settled, self.vals[settled])
+                self.rank[settled] = k
+                self.changed.add(k)
+            moving = members[~keep]
+            k += 1
+
+        if len(moving) > 0:
+            for F in frontsOf(ensSort(self.vals[moving])):
+                self.rank[moving[F]] = len(self.fronts)
+                self.changed.add(len(self.fronts))
+                self.fronts.append(_Front(moving[F], self.vals[moving[F]]))
+
+    def remove(self, i):
+        """ Removes i-th point. Elements of the next front it dominated, that
+        are not dominated by any other element of its front, move one front
+        up, possibly letting elements of the following front do the same,
+        and so on.
+        """
+        k = self.rank[i]
+        F = self.fronts[k]
+        F.keep(F.members != i)
+        self.rank[i] = -1
+        self.changed.add(k)
+        leaving = np.array([i])
+
+        while k + 1 < len(self.fronts):
+            G = self.fronts[k + 1]
+            candidates = G.members[dominatedMask(self.vals[leaving], G.values)]
+            if len(candidates) > 0 and self.fronts[k].size > 0:
+                still = dominatedMask(self.fronts[k].values, self.vals[candidates])
+                candidates = candidates[~still]
+            if len(candidates) == 0:
+                break
+
+            G.keep(~np.in1d(G.members, candidates))
+            self.fronts[k].extend(candidates, self.vals[candidates])
+            self.rank[candidates] = k
+            self.changed.add(k + 1)
+            leaving = candidates
+            k += 1
+
+        while self.fronts and self.fronts[-1].size == 0:
+            self.fronts.pop()
+
+
+def incrementalSort(vals, ranks):
+    """ Non-dominated sort of points, first len(ranks) of which are already
+    sorted, with their ranks given. Remaining points are inserted into the
+    existing fronts in a single batch.
+
+    vals  - N x M matrix of values (minimized)
+    ranks - ranks of the first points, valid among themselves
+    Returns: vector of ranks (front indices) of all the points
+    """
+    fronts = Fronts(vals, ranks)
+    fronts.insertBatch(np.arange(len(ranks), len(vals)))
+    return fronts.rank
+
+
+sorters = {
+    'naive': naiveSort,
+    'sweep': sweepSort,
+    'dc': divideAndConquerSort,
+    'ens': ensSort,
+}
@@ -1,5 +1,5 @@
 
-from random import random
+import random
 from collections import defaultdict
 from math import sqrt
 
@@ -21,27 +21,29 @@ def clamp(a, m, M):
     return m if a < m else M if a > M else a
 
 
-def rand(a, b):
+def rand(a, b, rng=None):
     """ Returns random, uniformly distributed real number
     between a and b.
+
+    rng - source of random numbers (RNG), random module by default
     """
-    t = random() # [0, 1)
+    t = (rng or random).random() # [0, 1)
     return lerp(a, b, t)
 
 
-def tossCoin(p):
+def tossCoin(p, rng=None):
     """ Returns True with probability p, and False otherwise"""
-    return random() <= p
+    return (rng or random).random() <= p
 
 
-def randVector(bounds):
+def randVector(bounds, rng=None):
     """ Returns random vector with components distributed uniformly on the
     interval defined by bounds.
 
     bounds - sequence of pairs of numbers (a, b), defining minimal and maximal
              values of each component
     """
-    return tuple(rand(a, b) for (a, b) in bounds)
+    return tuple(rand(a, b, rng) for (a, b) in bounds)
 
 
 def distance(u, v):
@@ -75,7 +77,8 @@ def weaklyInverslyDominates(a, b):
 
 def maximal(xs, less):
     """ Finds maximal (nondominated) elements of collection xs, wrt ordering
-    defined by argument 'less'.
+    defined by argument 'less'. For Pareto dominance of vectors, the much
+    faster sorting.maximalVectors can be used instead.
 
     xs   - iterable collection
     less - comparator representing strong order relation <, function of two
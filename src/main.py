@@ -2,17 +2,26 @@
 
 from IntOb.NSGAv2 import NSGA
 from IntOb.EMAS import EMAS, Stats
-from IntOb.hypervolume import hypervolume
+from IntOb.hypervolume import hypervolume, estimateHypervolume
 from IntOb.problems import *
+from IntOb.rng import RNG
 import sys
 
 class Callback(object):
 
-    def __init__(self, ranges, volume):
+    def __init__(self, ranges, volume, samples=None, error=None, seed=None):
+        """ samples, error - if either is given, hypervolume is estimated by
+                         sampling (see estimateHypervolume) instead of
+                         computed exactly
+        seed           - seed of the stream of samples
+        """
         self.ranes = ranges
         self.refpoint = tuple(r[1] for r in ranges)
         self.volume = volume
         self.gap = 10
+        self.samples = samples
+        self.error = error
+        self.rng = RNG(seed)
 
     def dump_to_file(self, step, guys):
         with open('step_{:04}.dat'.format(step), 'w') as out:
@@ -23,10 +32,20 @@ class Callback(object):
 
     def print_hypervolume(self, guys):
         vals = [guy.val for guy in guys]
+        if self.samples or self.error:
+            V, err, _ = estimateHypervolume(self.refpoint, vals,
+                                            self.samples, self.error,
+                                            rng=self.rng)
+            if self.volume:
+                print 'HVR = {:.2%} +/- {:.2%}'.format(V / self.volume, err / self.volume)
+            else:
+                print 'HV = {} +/- {}'.format(V, err)
+            return
+
         V = hypervolume(self.refpoint, vals)
 
         if self.volume:
-            print 'HVR = {:.2%}'.format(V / volume)
+            print 'HVR = {:.2%}'.format(V / self.volume)
         else:
             print 'HV = {}'.format(V)
 
@@ -0,0 +1,109 @@
+#! /usr/bin/env python
+
+from IntOb.genetics import Specimen
+from IntOb.EMAS.Agent import Agent, ColumnAgent
+from IntOb.EMAS.columns import AgentColumns
+from random import random
+import sys
+
+
+class DictSpecimen(object):
+    """ Layout of Specimen before __slots__
+    """
+
+    def __init__(self, x):
+        self.x = tuple(x)
+        self.val = None
+
+
+class DictAgent(object):
+    """ Layout of Agent before __slots__ and array genotypes
+    """
+
+    def __init__(self, x, val, energy, env):
+        self.env = env
+        self.x = tuple(x)
+        self.energy = energy
+        self.val = val
+        self.encounter_count = 0
+        self.dist = 0
+
+
+def deep_size(obj, shared, seen):
+    """ Computes number of bytes taken by obj and objects it refers to,
+    skipping objects in shared and counting each object once.
+    """
+    if id(obj) in seen or id(obj) in shared:
+        return 0
+    if obj is None or isinstance(obj, (str, bool)):
+        return 0
+    if isinstance(obj, int) and -5 <= obj <= 256:
+        return 0
+
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    refs = []
+    if isinstance(obj, (tuple, list)):
+        refs.extend(obj)
+    elif isinstance(obj, dict):
+        refs.extend(obj.keys())
+        refs.extend(obj.values())
+    if hasattr(obj, '__dict__'):
+        refs.append(obj.__dict__)
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(obj, name) and not isinstance(getattr(type(obj), name), property):
+                refs.append(getattr(obj, name))
+
+    return size + sum(deep_size(r, shared, seen) for r in refs)
+
+
+def per_individual(objects, shared):
+    seen = set()
+    return float(sum(deep_size(o, shared, seen) for o in objects)) / len(objects)
+
+
+def measure(dim, count):
+    env = object()
+    shared = set([id(env)])
+    points = [[random() for _ in xrange(dim)] for _ in xrange(count)]
+    vals = [(random(), random()) for _ in xrange(count)]
+
+    def specimens(cls):
+        guys = [cls(x) for x in points]
+        for guy, val in zip(guys, vals):
+            guy.val = val
+        return guys
+
+    def agents(cls):
+        return [cls(x, val, random(), env) for x, val in zip(points, vals)]
+
+    columns = AgentColumns(dim, 2, capacity=count)
+    column_agents = agents(ColumnAgent)
+    for agent in column_agents:
+        agent.attach(columns)
+    shared.add(id(columns))
+    arrays = sum(getattr(columns, name).nbytes for name in columns.fields)
+    arrays += columns.alive.nbytes + sys.getsizeof(columns.agents)
+
+    numeric = (dim + 2 + 3) * 8
+    rows = [
+        ('Specimen (dict)', per_individual(specimens(DictSpecimen), shared)),
+        ('Specimen (slots)', per_individual(specimens(Specimen), shared)),
+        ('Agent (dict)', per_individual(agents(DictAgent), shared)),
+        ('Agent (slots, array)', per_individual(agents(Agent), shared)),
+        ('ColumnAgent + columns', per_individual(column_agents, shared)
+                                  + float(arrays) / count),
+    ]
+
+    print 'dimension = {}, individuals = {}'.format(dim, count)
+    print 'numeric payload of an agent: {} bytes'.format(numeric)
+    for name, size in rows:
+        print '{:24} {:8.1f} bytes per individual'.format(name, size)
+
+
+if __name__ == '__main__':
+    dim = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    measure(dim, count)
@@ -1,7 +1,27 @@
 
 import IntOb.NSGAv2 as nsga
+import os
 import unittest
+import numpy as np
 from itertools import repeat
+from IntOb.population import Population
+from IntOb.genetics import Specimen, selectIndices
+from IntOb.rng import RNG
+from IntOb.hypervolume import hypervolume, hypervolume2d, cuboidHypervolume
+from IntOb.hypervolume import hypervolume3d, wfgHypervolume
+from IntOb.hypervolume import contributions, reduceFront, estimateHypervolume
+from itertools import combinations, count
+from IntOb.sorting import sorters, naiveSort, frontsOf, incrementalSort
+from IntOb.sorting import Fronts, nondominatedMask, maximalVectors
+from IntOb.utils import maximal, inverslyDominates, dominates
+from IntOb.evaluation import Objectives, batchEvaluator, PoolEvaluator
+from IntOb.evaluation import CachedEvaluator
+from IntOb.problems import ZDT1, ZDT2, ZDT3
+from IntOb.EMAS import EMAS, Agent
+from IntOb.EMAS.columns import AgentColumns
+from IntOb.EMAS.containers import IndexedSet
+from IntOb.EMAS.topology import topology
+from IntOb.EMAS.EMAS import Island
 
 
 class Test(unittest.TestCase):
@@ -10,19 +30,19 @@ class Test(unittest.TestCase):
     def test_dominates_donminatesWhenGreaterAtOnePosition(self):
         a = [1, 2, 3]
         b = [1, 3, 3]
-        self.assertTrue(nsga.dominates(a, b))
+        self.assertTrue(dominates(a, b))
 
 
     def test_dominates_dominatesWhenGreaterAtAllPositions(self):
         a = [1, 2, 3]
         b = [7, 3, 4]
-        self.assertTrue(nsga.dominates(a, b))
+        self.assertTrue(dominates(a, b))
 
 
     def test_dominates_notDominatesWhenLessAtOnePosition(self):
         a = [1, 2, 3]
         b = [7, 1, 9]
-        self.assertFalse(nsga.dominates(a, b))
+        self.assertFalse(dominates(a, b))
 
 
     def test_nonDominatedSort(self):
@@ -39,7 +59,7 @@ class Test(unittest.TestCase):
                     for q in fronts[j]:
                         fp = valueMap[p]
                         fq = valueMap[q]
-                        self.assertFalse(nsga.dominates(fp, fq))
+                        self.assertFalse(dominates(fp, fq))
         for p in points:
             rank = ranks[p]
             self.assertIn(p, fronts[rank])
@@ -61,6 +81,29 @@ class Test(unittest.TestCase):
         self.assertEqual(nsga.volBetween(a, b), 6)
 
 
+    def slowCrowdingDistances(self, vals, ranks, ranges):
+        crowd = [0.0] * len(vals)
+        for rank in set(ranks):
+            front = [j for j in xrange(len(vals)) if ranks[j] == rank]
+            for i in xrange(len(ranges)):
+                ordered = sorted(front, key=lambda j: vals[j][i])
+                d = float(ranges[i][1] - ranges[i][0])
+                crowd[ordered[0]] = crowd[ordered[-1]] = float('+inf')
+                for a, j, b in zip(ordered, ordered[1:], ordered[2:]):
+                    crowd[j] += (vals[b][i] - vals[a][i]) / d
+        return crowd
+
+
+    def test_crowdingDistances_matchesSlowImplementation(self):
+        ranges = [(0, 2), (0, 1), (-1, 3)]
+        for vals in [np.random.random((60, 3)),
+                     np.random.randint(0, 3, (60, 3)).astype(float)]:
+            ranks = np.random.randint(0, 5, 60)
+            crowd = nsga.crowdingDistances(vals, ranks, ranges)
+            expected = self.slowCrowdingDistances(vals, ranks, ranges)
+            self.assertTrue(np.allclose(crowd, expected))
+
+
     #def test_crowdingDistance(self):
     #    points = [1, 2, 3, 4]
     #    vals   = [(3, 3), (1, 5), (2, 4), (0, 6)]
@@ -122,6 +165,498 @@ class Test(unittest.TestCase):
         self.assertEqual(nsga.hypervolume(p, xs), 0.75)
 
 
+    def test_population_pendingAndTake(self):
+        P = Population.random(5, [(0, 1), (2, 3)], 2)
+        self.assertSequenceEqual(list(P.pending()), range(5))
+
+        P.val[[1, 3]] = [(1, 2), (3, 4)]
+        self.assertSequenceEqual(list(P.pending()), [0, 2, 4])
+
+        Q = P.take([3, 1])
+        self.assertSequenceEqual(list(Q.pending()), [])
+        self.assertEqual(Q.specimen(0).val, (3, 4))
+        self.assertTrue(np.all(Q.x[1] == P.x[1]))
+
+
+    def test_sorters_agreeWithNaiveSort(self):
+        for m in [1, 2, 3, 5]:
+            for vals in [np.random.random((80, m)),
+                         np.random.randint(0, 4, (80, m)).astype(float)]:
+                expected = naiveSort(vals)
+                for name, sort in sorters.iteritems():
+                    if name == 'sweep' and m != 2:
+                        continue
+                    ranks = sort(vals)
+                    self.assertSequenceEqual(list(ranks), list(expected), name)
+
+
+    def test_incrementalSort_agreesWithNaiveSort(self):
+        for m in [2, 3]:
+            for vals in [np.random.random((80, m)),
+                         np.random.randint(0, 4, (80, m)).astype(float)]:
+                ranks = incrementalSort(vals, naiveSort(vals[:40]))
+                self.assertSequenceEqual(list(ranks), list(naiveSort(vals)))
+
+
+    def test_fronts_insertAndRemove(self):
+        vals = np.random.randint(0, 4, (40, 3)).astype(float)
+        fronts = Fronts(vals, naiveSort(vals[:30]))
+        alive = range(30)
+
+        for i in xrange(30, 40):
+            fronts.insert(i)
+            alive.append(i)
+            dead = alive.pop(np.random.randint(len(alive)))
+            fronts.remove(dead)
+
+            expected = naiveSort(vals[alive])
+            self.assertSequenceEqual(list(fronts.rank[alive]), list(expected))
+            self.assertEqual(len(fronts), max(expected) + 1)
+
+
+    def test_fronts_insertBatch(self):
+        for m in [2, 3]:
+            vals = np.random.randint(0, 5, (60, m)).astype(float)
+            fronts = Fronts(vals, naiveSort(vals[:30]))
+            for i in xrange(0, 30, 3):
+                fronts.remove(i)
+            fronts.insertBatch(np.arange(30, 60))
+
+            alive = [i for i in xrange(60) if i >= 30 or i % 3]
+            expected = naiveSort(vals[alive])
+            self.assertSequenceEqual(list(fronts.rank[alive]), list(expected))
+            self.assertEqual(len(fronts), max(expected) + 1)
+
+
+    def test_frontsOf(self):
+        fronts = frontsOf(np.array([1, 0, 2, 0, 1]))
+        self.assertSequenceEqual(map(list, fronts), [[1, 3], [0, 4], [2]])
+
+
+    def test_batchEvaluator_matchesPointwise(self):
+        X = np.random.random((20, 3))
+        for problem in [ZDT1, ZDT2, ZDT3]:
+            F = problem()[0]
+            pointwise = batchEvaluator(Objectives(F))
+            self.assertTrue(np.allclose(batchEvaluator(F)(X), pointwise(X)))
+
+
+    def test_poolEvaluator_keepsOrderWithLambdas(self):
+        f = batchEvaluator((lambda x: x[0] + x[1], lambda x: x[0] * x[1]))
+        X = np.random.random((25, 2))
+        for kind in ['process', 'thread']:
+            e = PoolEvaluator(f, kind, workers=2, chunk_size=3)
+            try:
+                self.assertTrue(np.array_equal(e(X), f(X)))
+            finally:
+                e.close()
+
+
+    def test_selectIndices_pressure(self):
+        rank = np.array([0, 1, 1, 2])
+        crowd = np.array([0.0, 2.0, 1.0, 5.0])
+        keys = (rank, -crowd)
+
+        best = selectIndices(keys, 1000, 1.0)
+        self.assertNotIn(3, best)
+        worst = selectIndices(keys, 1000, 0.0)
+        self.assertNotIn(0, worst)
+        self.assertEqual(len(set(selectIndices(keys, 1000, 0.5))), 4)
+        only = selectIndices((np.array([0]),), 5, 0.5)
+        self.assertSequenceEqual(list(only), [0] * 5)
+
+
+    def test_createOffspring_crossesOddBatches(self):
+        alg = nsga.NSGA(ZDT1()[0], [(0, 1)] * 3, [(0, 1), (0, 10)],
+                        crossover_prob=1, mutation_prob=0, seed=1)
+        P = Population(np.random.random((2, 3)), m=2)
+        P.rank = np.zeros(2, dtype=int)
+        P.crowd = np.zeros(2)
+
+        for N in [1, 3]:
+            children = np.vstack([alg.createOffspring(P, N).x for _ in xrange(20)])
+            self.assertEqual(len(children), 20 * N)
+            parents = (children[:, np.newaxis] == P.x).all(axis=2).any(axis=1)
+            self.assertFalse(parents.all())
+
+
+    def test_steadyState_timesOutOnLostBatch(self):
+        class Lost(object):
+            workers = 1
+            def submit(self, X, callback):
+                pass
+            def terminate(self):
+                pass
+
+        alg = nsga.NSGA(ZDT1()[0], [(0, 1)] * 3, [(0, 1), (0, 10)],
+                        population_size=10, evaluation_timeout=0.05)
+        alg.executor = Lost()
+        self.assertRaises(RuntimeError, alg.optimizeSteadyState, 5)
+
+
+    def test_steadyState_terminatesPoolWithDeadWorker(self):
+        fs = ZDT1()[0]
+        def dying(X):
+            if len(X) < 10:
+                os._exit(1)
+            return fs.batch(X)
+
+        alg = nsga.NSGA(Objectives(fs, batch=dying), [(0, 1)] * 3,
+                        [(0, 1), (0, 10)], population_size=10,
+                        executor='process', workers=1, chunk_size=10,
+                        evaluation_timeout=0.2)
+        self.assertRaises(RuntimeError, alg.optimizeSteadyState, 5)
+        self.assertIsNone(alg.executor.pool)
+
+
+    def test_steadyState_submitsOnlyUsedBatches(self):
+        calls = []
+        fs = ZDT1()[0]
+        def f(X):
+            calls.append(len(X))
+            return fs.batch(X)
+
+        alg = nsga.NSGA(Objectives(fs, batch=f), [(0, 1)] * 3,
+                        [(0, 1), (0, 10)], population_size=10,
+                        executor='thread', workers=3, chunk_size=10)
+        alg.optimizeSteadyState(5)
+        self.assertEqual(calls.count(1), 5)
+
+
+    def test_cachedEvaluator_countsAndEvicts(self):
+        calls = []
+        def f(X):
+            calls.append(len(X))
+            return X * 2
+        cache = CachedEvaluator(f, size=3)
+
+        X = np.array([[1.0], [2.0], [1.0]])
+        self.assertTrue(np.array_equal(cache(X), X * 2))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        cache(np.array([[3.0], [4.0]]))
+        self.assertFalse(cache.covers(np.array([[1.0]])))
+        self.assertTrue(cache.covers(np.array([[2.0], [4.0]])))
+        self.assertSequenceEqual(calls, [2, 2])
+
+
+    def test_cachedEvaluator_quantizedKeys(self):
+        cache = CachedEvaluator(lambda X: X, size=10, quantum=0.1)
+        cache(np.array([[0.51]]))
+        val = cache(np.array([[0.49]]))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(val[0, 0], 0.51)
+
+
+    def test_hypervolume2d_matchesCuboids(self):
+        p = (1, 1)
+        for xs in [np.random.random((30, 2)),
+                   np.random.randint(0, 4, (30, 2)) / 4.0]:
+            xs = map(tuple, xs)
+            self.assertAlmostEqual(hypervolume2d(p, xs), cuboidHypervolume(p, xs))
+        self.assertEqual(hypervolume(p, [(0.5, 0.5), (0, 0.75), (0.75, 0)]), 0.5)
+        self.assertEqual(hypervolume2d(p, []), 0)
+        self.assertRaises(ValueError, cuboidHypervolume, (1, 1, 1), [(0, 0, 0)])
+
+
+    def inclusionExclusion(self, p, xs):
+        volume = 0
+        for k in xrange(1, len(xs) + 1):
+            for subset in combinations(xs, k):
+                corner = np.max(subset, axis=0)
+                volume += (-1)**(k + 1) * np.prod(np.clip(p - corner, 0, None))
+        return volume
+
+
+    def test_hypervolume_manyObjectives(self):
+        for d in [3, 4, 5]:
+            p = np.ones(d)
+            for xs in [np.random.random((7, d)),
+                       np.random.randint(0, 4, (7, d)) / 4.0]:
+                expected = self.inclusionExclusion(p, xs)
+                self.assertAlmostEqual(wfgHypervolume(p, xs), expected)
+                self.assertAlmostEqual(hypervolume(p, xs), expected)
+                if d == 3:
+                    self.assertAlmostEqual(hypervolume3d(p, xs), expected)
+
+
+    def test_contributions_matchLeaveOneOut(self):
+        for d in [2, 3, 4]:
+            p = np.ones(d)
+            for xs in [np.random.random((15, d)),
+                       np.random.randint(0, 5, (15, d)) / 4.0]:
+                total = hypervolume(p, xs)
+                expected = [total - hypervolume(p, np.delete(xs, i, axis=0))
+                            for i in xrange(len(xs))]
+                self.assertTrue(np.allclose(contributions(p, xs), expected))
+
+
+    def test_reduceFront_dropsLeastContributing(self):
+        p = np.ones(2)
+        xs = np.array([[0.0, 0.9], [0.1, 0.5], [0.12, 0.48], [0.5, 0.1], [0.9, 0.0]])
+        self.assertEqual(list(reduceFront(p, xs, 4)), [0, 1, 3, 4])
+        for d in [2, 3]:
+            xs = np.random.random((30, d))
+            xs = xs[naiveSort(xs) == 0]
+            kept = range(len(xs))
+            while len(kept) > len(xs) // 2:
+                kept.pop(np.argmin(contributions(np.ones(d), xs[kept])))
+            self.assertEqual(list(reduceFront(np.ones(d), xs, len(xs) // 2)), kept)
+
+
+    def test_estimateHypervolume_coversExactValue(self):
+        np.random.seed(1)
+        p = np.ones(5)
+        xs = np.random.random((40, 5))
+        exact = hypervolume(p, xs)
+        estimate = estimateHypervolume(p, xs, samples=20000, confidence=0.999,
+                                       rng=RNG(1))
+        self.assertEqual(estimate.samples, 20000)
+        self.assertTrue(estimate.low <= exact <= estimate.high)
+        self.assertEqual(estimateHypervolume(p, xs, samples=20000,
+                                             confidence=0.999, rng=RNG(1)),
+                         estimate)
+
+        estimate = estimateHypervolume(p, xs, error=0.01, rng=RNG(2))
+        self.assertTrue(estimate.error <= 0.01 * estimate.volume)
+        self.assertEqual(estimateHypervolume(p, [[2, 0, 0, 0, 0]]).volume, 0)
+        self.assertRaises(ValueError, estimateHypervolume, p, xs, samples=None)
+
+
+    def test_nondominatedMask_agreesWithMaximal(self):
+        for d in [2, 3, 5]:
+            for vals in [np.random.random((200, d)),
+                         np.random.randint(0, 4, (200, d)).astype(float)]:
+                mask = nondominatedMask(vals, block=16)
+                self.assertTrue(np.array_equal(mask, naiveSort(vals) == 0))
+
+                points = [tuple(v) for v in vals]
+                expected = maximal(points, inverslyDominates)
+                self.assertEqual(maximalVectors(points), expected)
+
+                unique = vals[nondominatedMask(vals, unique=True, block=16)]
+                self.assertEqual(len(unique), len(set(expected)))
+                self.assertEqual(set(map(tuple, unique)), set(expected))
+
+
+    def test_agentColumns_reusesSlots(self):
+        columns = AgentColumns(2, 2, capacity=2)
+        slots = [columns.allocate(i, (i, i), (i, 0), 0.1 * i) for i in xrange(5)]
+        self.assertEqual(columns.capacity, 8)
+        state = columns.release(slots[3])
+        self.assertEqual(state['x'], (3.0, 3.0))
+        self.assertEqual(columns.allocate(5, (5, 5), (5, 0), 0.5), slots[3])
+        self.assertEqual(columns.select(columns.at_least(0.15)), [2, 5, 4])
+        self.assertEqual(columns.select(~columns.at_least(0.15)), [0, 1])
+        self.assertEqual(list(columns.energy_histogram(2)), [4, 1])
+
+
+    def test_emas_columnStorage_conservesEnergy(self):
+        F, bounds, ranges, _ = ZDT1()
+        alg = EMAS(F, bounds, ranges, storage='columns', world_size=2,
+                   population_size=20)
+        agents = alg.optimize(5)
+        total = sum(a.energy for a in agents) + sum(i.energy for i in alg.world)
+        self.assertAlmostEqual(total, 40 * alg.params['init_energy'])
+        for island in alg.world:
+            self.assertEqual(len(island.columns), len(island.inhabitants))
+
+
+    def test_indexedSet_removeAndChooseOther(self):
+        items = IndexedSet(range(10))
+        for x in [3, 9, 0]:
+            items.remove(x)
+        self.assertEqual(sorted(items), [1, 2, 4, 5, 6, 7, 8])
+        self.assertTrue(all(items.items[items.positions[x]] == x for x in items))
+
+        drawn = [items.choice_other(5) for _ in xrange(7000)]
+        self.assertNotIn(5, drawn)
+        counts = np.bincount(drawn, minlength=9)[[1, 2, 4, 6, 7, 8]]
+        self.assertTrue(np.all(counts > 1000))
+        self.assertIsNone(IndexedSet([1]).choice_other(1))
+
+
+    def test_spreadIndex_tracksCapableAgents(self):
+        F, bounds, ranges, _ = ZDT1()
+        for storage in ['objects', 'columns']:
+            alg = EMAS(F, bounds, ranges, storage=storage, world_size=2,
+                       population_size=30)
+            alg.optimize(5)
+            for island in alg.world:
+                env = alg.envs[island]
+                capable = set(a for a in island.inhabitants if a.can_reproduce())
+                self.assertEqual(set(island.mates.entries), capable)
+                for agent in island.inhabitants:
+                    mates = [a for a in island.inhabitants
+                             if a is not agent and a.can_reproduce()]
+                    mate = env.find_mate(agent)
+                    if mates:
+                        best = max(m.spread for m in mates)
+                        self.assertEqual(mate.spread, best)
+                    else:
+                        self.assertIsNone(mate)
+
+
+    def test_emas_parallel_conservesEnergy(self):
+        F, bounds, ranges, _ = ZDT1()
+        alg = EMAS(F, bounds, ranges, world_size=3, population_size=20,
+                   island_workers=2, sync_interval=3)
+        steps = []
+
+        def check(step, agents):
+            steps.append(step)
+            total = sum(a.energy for a in agents) + sum(i.energy for i in alg.world)
+            self.assertAlmostEqual(total, 60 * alg.params['init_energy'])
+            uids = [a.uid for a in agents]
+            self.assertEqual(len(set(uids)), len(uids))
+
+        alg.optimize(7, check)
+        self.assertEqual(steps, [0, 3, 6, 7])
+
+
+    def test_emas_parallel_evaluatesInWorkerPools(self):
+        _, bounds, ranges, _ = ZDT1()
+        fs = (lambda x: x[0], lambda x: float(os.getppid()))
+        alg = EMAS(fs, bounds, ranges, world_size=2, population_size=20,
+                   island_workers=2, sync_interval=2, executor='process',
+                   workers=2, deferred_evaluation=True, seed=1)
+        pools = []
+        agents = alg.optimize(6, lambda step, _: pools.append(alg.executor.pool))
+        self.assertTrue(pools)
+        self.assertEqual(pools, [None] * len(pools))
+        # newborns are evaluated by children of the island workers
+        parents = set(a.val[1] for a in agents if isinstance(a.uid, tuple))
+        self.assertTrue(parents)
+        self.assertNotIn(os.getpid(), parents)
+
+
+    def test_emas_deferredEvaluation_batchesNewborns(self):
+        F, bounds, ranges, _ = ZDT1()
+        alg = EMAS(F, bounds, ranges, world_size=2, population_size=20,
+                   deferred_evaluation=True, seed=1)
+        batches = []
+        evaluate = alg.fbatch
+        alg.fbatch = lambda X: (batches.append(len(X)), evaluate(X))[1]
+
+        def check(step, agents):
+            self.assertEqual(alg.newborns, [])
+            self.assertTrue(all(a.val is not None for a in agents))
+
+        alg.optimize(4, check)
+        self.assertEqual(batches[:2], [20, 20])
+        self.assertTrue(len(batches[2:]) <= 4)
+        self.assertTrue(max(batches[2:]) >= 4)
+        reproductions = sum(env.reproductions for env in alg.envs.itervalues())
+        self.assertEqual(sum(batches[2:]), 2 * reproductions)
+
+
+    def test_indexedSet_snapshotCopiesOnWrite(self):
+        items = IndexedSet(range(5))
+        view = items.snapshot()
+        self.assertIs(items.snapshot(), view)
+        shared = items.items
+        items.remove(0)
+        items.add(7)
+        self.assertEqual(list(view), range(5))
+        self.assertEqual(sorted(items), [1, 2, 3, 4, 7])
+
+        del view
+        current = items.items
+        items.remove(1)
+        self.assertIs(items.items, current)
+        self.assertIsNot(shared, current)
+
+
+    def test_indexedSet_sweepVisitsInitialElements(self):
+        rng = RNG(3)
+        items = IndexedSet(range(50))
+        shared = items.items
+        visited = []
+        removed = set()
+        new = count(100)
+
+        for item in items.sweep():
+            visited.append(item)
+            for _ in xrange(rng.randrange(3)):
+                victim = items.choice(rng)
+                items.remove(victim)
+                removed.add(victim)
+            if rng.random() < 0.5:
+                items.add(next(new))
+
+        self.assertIs(items.items, shared)
+        self.assertEqual(len(visited), len(set(visited)))
+        skipped = set(range(50)) - set(visited)
+        self.assertTrue(skipped and skipped <= removed)
+        self.assertTrue(all(item < 100 for item in visited))
+        for i, item in enumerate(items.items):
+            self.assertEqual(items.positions[item], i)
+
+
+    def test_emas_populationView_isSnapshot(self):
+        F, bounds, ranges, _ = ZDT1()
+        alg = EMAS(F, bounds, ranges, world_size=2, population_size=20)
+        views = []
+        alg.optimize(3, lambda step, agents: views.append((agents, list(agents))))
+        for view, agents in views:
+            self.assertEqual(list(view), agents)
+            self.assertEqual(len(view), len(agents))
+
+
+    def test_topology_degrees(self):
+        expected = {'complete': 19, 'ring': 2, 'torus': 4, 'regular': 4}
+        for name, degree in expected.iteritems():
+            edges = topology(name, 20)
+            counts = np.bincount(np.array(list(edges)).ravel(), minlength=20)
+            self.assertTrue(np.all(counts == degree))
+            self.assertTrue(all(a < b for a, b in edges))
+        self.assertEqual(len(topology('small_world', 20, 4, 0.5)), 40)
+        self.assertRaises(ValueError, topology, 'regular', 7, 3)
+        self.assertRaises(ValueError, topology, 'regular', 4, 4)
+
+
+    def test_island_randomDestination_withinBudget(self):
+        island = Island(0)
+        others = [Island(0) for _ in xrange(4)]
+        for cost, other in zip([0.3, 0.1, 0.4, 0.2], others):
+            island.add_neighbour(other, cost)
+        self.assertIsNone(island.random_destination(0.05))
+        drawn = set(island.random_destination(0.25) for _ in xrange(100))
+        self.assertEqual(drawn, set([others[1], others[3]]))
+
+
+    def test_rng_blocksAndStreams(self):
+        a, b = RNG(7, block=5), RNG(7, block=5)
+        self.assertEqual([a.random() for _ in xrange(12)], b.block(12))
+        self.assertEqual([s.random() for s in RNG(3).spawn(3)],
+                         [s.random() for s in RNG(3).spawn(3)])
+        self.assertNotEqual(*[s.random() for s in RNG(3).spawn(2)])
+
+
+    def test_emas_seedReproducible(self):
+        F, bounds, ranges, _ = ZDT1()
+
+        def run():
+            alg = EMAS(F, bounds, ranges, world_size=2, population_size=20, seed=11)
+            return sorted((a.x, a.val, a.energy) for a in alg.optimize(5))
+
+        self.assertEqual(run(), run())
+
+
+    def test_compactRecords(self):
+        agent = Agent((0.25, 0.5), (1.0, 2.0), 0.3, None)
+        self.assertFalse(hasattr(agent, '__dict__'))
+        self.assertEqual(agent.x.typecode, 'd')
+        self.assertEqual(list(agent.x), [0.25, 0.5])
+        self.assertIsNone(agent.name)
+        self.assertFalse(hasattr(Specimen((1, 2)), '__dict__'))
+
+        F, bounds, ranges, _ = ZDT1()
+        alg = EMAS(F, bounds, ranges, world_size=2, population_size=10,
+                   agent_names=False)
+        self.assertTrue(all(a.name is None for a in alg.optimize(2)))
+
+
 if __name__ == '__main__':
     unittest.main()
 